@@ -40,30 +40,202 @@ In production, API keys should be stored securely in environment variables.
 OPENAI_API_KEY = ""
 
 # Standard library imports
+import calendar
+import csv
+import hashlib
+import importlib.metadata
+import io
+import json
 import os
 import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing, contextmanager, redirect_stdout
 from datetime import datetime, timedelta
+from functools import partial
 
-# Third-party imports 
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from textblob import TextBlob
-from openai import OpenAI
+# Third-party imports (and the slow-to-import asyncio) are deferred until a
+# feature first uses them, so the menu appears without loading pandas,
+# plotting, NLP or API libraries
+class _LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+    
+    Args:
+        name (str): Module to import
+        on_import (callable): Called once with the module after importing it
+    """
+    def __init__(self, name, on_import=None):
+        self._name = name
+        self._on_import = on_import
+        self._module = None
+    
+    def __getattr__(self, attr):
+        if self._module is None:
+            module = importlib.import_module(self._name)
+            if self._on_import is not None:
+                self._on_import(module)
+            self._module = module
+        return getattr(self._module, attr)
+
+np = _LazyModule('numpy')
+pd = _LazyModule('pandas')
+plt = _LazyModule('matplotlib.pyplot')
+mpl_figure = _LazyModule('matplotlib.figure')
+backend_agg = _LazyModule('matplotlib.backends.backend_agg')
+sns = _LazyModule('seaborn')
+textblob = _LazyModule('textblob')
+openai = _LazyModule('openai')
+httpx = _LazyModule('httpx')
+asyncio = _LazyModule('asyncio')
+
+# Where suggestions come from: 'openai', 'local' (offline, from your own
+# history) or 'auto' (OpenAI when an API key is configured, local otherwise)
+SUGGESTION_PROVIDER = 'auto'
+
+# Alternative OpenAI-compatible server, e.g. a local stub; None uses the default
+OPENAI_BASE_URL = None
+
+# Provider instances created by get_suggestion_provider
+_suggestion_providers = {}
+
+# Seconds to wait for an AI suggestion before giving up on it
+SUGGESTION_TIMEOUT = 30
+
+# Suggestion API client policy: pooled connections, seconds to establish one,
+# retries of transient failures with exponential backoff (base and cap in seconds)
+SUGGESTION_MAX_CONNECTIONS = 10
+SUGGESTION_CONNECT_TIMEOUT = 5
+SUGGESTION_MAX_RETRIES = 4
+SUGGESTION_BACKOFF_BASE = 0.5
+SUGGESTION_BACKOFF_MAX = 30
+
+# Throttling of suggestion requests: requests in flight at once, average
+# requests per second (None for no limit) and the burst allowed above that rate
+SUGGESTION_MAX_CONCURRENCY = 4
+SUGGESTION_RATE_LIMIT = 3.0
+SUGGESTION_RATE_BURST = 5
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Persistent cache of AI suggestions: location, lifetime in seconds and maximum entries
+SUGGESTION_CACHE_FILE = 'data/suggestion_cache.db'
+SUGGESTION_CACHE_TTL = 7 * 24 * 3600
+SUGGESTION_CACHE_SIZE = 1000
+
+# Suggestions generated for past entries, kept permanently (see generate_suggestions)
+SUGGESTIONS_FILE = 'data/suggestions.db'
+
+# Print suggestions token by token as they arrive instead of in the background
+SUGGESTION_STREAMING = False
 
-# Set plotting style
-sns.set(style="whitegrid")
+# Suggestions being fetched in the background, see provide_suggestions_async
+_suggestions_lock = threading.Lock()
+_pending_suggestions = set()
+_cancelled_suggestions = set()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Serializes multi-line console output, so a suggestion printed from a
+# background thread never lands in the middle of another block
+_console_lock = threading.RLock()
 
-# Define the path for the CSV file
+# Time-to-first-token measurements of streamed suggestions
+_suggestion_metrics = {'streams': 0, 'last_ttft': None, 'total_ttft': 0.0}
+
+# Import-time budget for showing the menu, checked by check_startup
+STARTUP_BUDGET_MS = 150
+STARTUP_HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'seaborn', 'textblob', 'openai')
+
+# Where charts go: None shows them in a window, a directory makes the views
+# render them headlessly (Agg) to files in PLOT_FORMAT ('png' or 'svg')
+PLOT_OUTPUT_DIR = None
+PLOT_FORMAT = 'png'
+
+# Rendered charts by data version and chart parameters; cleared on every write
+CHART_CACHE_DIR = 'data/chart_cache'
+
+# Off-screen figures reused across headless renders, by chart name
+_render_lock = threading.Lock()
+_figures = {}
+
+# Whether the seaborn plotting style has been set, see _apply_plot_style
+_plot_style_applied = [False]
+
+# Co-occurrences an activity-mood pair needs before top_associations ranks it
+ASSOCIATION_MIN_COUNT = 3
+
+# Define the path for the data file; the extension selects the storage backend
+# (.csv, .parquet or .feather/.arrow)
 DATA_FILE = 'data/mood_data.csv'
 
+# Storage backend override ('csv', 'parquet' or 'feather'); None picks it from DATA_FILE
+STORAGE_BACKEND = None
+
+# Columns of the mood log, in file order
+DATA_COLUMNS = ['Date', 'Mood', 'Activities', 'Notes', 'Sentiment']
+
+# Number of superseded (overwritten) rows tolerated before the log is compacted
+COMPACTION_THRESHOLD = 20
+
+# Rows a columnar backend keeps in its CSV write log before folding them into the main file
+LOG_FOLD_THRESHOLD = 500
+
+# Polarity beyond which a note counts as Positive/Negative
+SENTIMENT_THRESHOLD = 0.1
+
+# Notes per chunk sent to a sentiment worker process
+SENTIMENT_CHUNK_SIZE = 1000
+
+# Persistent cache of sentiment scores and the maximum number of notes it keeps
+SENTIMENT_CACHE_FILE = 'data/sentiment_cache.db'
+SENTIMENT_CACHE_SIZE = 100000
+
+# How bulk_import handles dates that already have an entry
+IMPORT_CONFLICT_POLICIES = ('keep', 'overwrite', 'error')
+
+# Guards appends and compaction of the data file
+_storage_lock = threading.RLock()
+_compaction_thread = None
+
+# Held for a whole compaction, so two never share the staged files
+_compaction_lock = threading.Lock()
+
+# Number of activity merges so far; an index built in the background is
+# discarded if a merge changed the activity IDs meanwhile
+_vocabulary_merges = [0]
+
+# Parsed entries kept in memory, valid while the data file signature is unchanged;
+# 'by_date' holds copies sorted by date for windowed queries
+_entries_cache = {'signature': None, 'frames': {}, 'by_date': {}}
+
+# Trailing windows (in days) of the rolling mood and sentiment distributions
+ROLLING_WINDOWS = (7, 30, 90)
+
+# Date window the analysis views use unless given one, see set_analysis_window
+_analysis_window = {'start_date': None, 'end_date': None, 'last_days': None}
+
 # Define common moods for validation
 COMMON_MOODS = ['happy', 'sad', 'anxious', 'excited', 'tired', 'energetic', 
                 'calm', 'stressed', 'content', 'frustrated']
 
+# Declared schema of the mood dataset, applied once when entries are loaded.
+# Date is kept as datetime64[s] at midnight (pandas has no day resolution);
+# Mood and Sentiment are categoricals with fixed categories.
+MOOD_CATEGORIES = [mood.title() for mood in COMMON_MOODS]
+SENTIMENT_CATEGORIES = ['Positive', 'Neutral', 'Negative']
+
+# Moods that count as good or bad days
+POSITIVE_MOODS = ['Happy', 'Excited', 'Content']
+NEGATIVE_MOODS = ['Sad', 'Anxious', 'Frustrated']
+DATE_FORMAT = '%Y-%m-%d'
+
 def validate_mood_input(mood):
     """
     Validates mood input against common moods.
@@ -85,273 +257,2870 @@ def validate_mood_input(mood):
         
     return True, mood
 
-def analyze_sentiment(notes):
+def analyze_sentiment(notes):
+    """
+    Analyzes the sentiment of provided text using TextBlob.
+    
+    Notes scored before are answered from the sentiment cache.
+    
+    Args:
+        notes (str): Text to analyze
+        
+    Returns:
+        str: Sentiment category ('Positive', 'Negative', or 'Neutral')
+    """
+    polarity, _ = score_sentiments([notes], workers=1)
+    return str(sentiment_labels(polarity)[0])
+
+def _score_chunk(notes):
+    """
+    Scores a chunk of notes with TextBlob; runs inside worker processes.
+    
+    Args:
+        notes (list): Texts to analyze
+        
+    Returns:
+        list: (polarity, subjectivity) tuples
+    """
+    return [tuple(textblob.TextBlob(note).sentiment) for note in notes]
+
+def _sentiment_cache_key(note, analyzer_version):
+    """
+    Content address of a note: hash of the analyzer version and the
+    whitespace-normalized text.
+    """
+    normalized = ' '.join(note.split())
+    return hashlib.sha256(f"{analyzer_version}\0{normalized}".encode('utf-8')).hexdigest()
+
+def _analyzer_version():
+    """
+    Returns the version of the sentiment analyzer, part of every cache key.
+    """
+    try:
+        return f"textblob-{importlib.metadata.version('textblob')}"
+    except importlib.metadata.PackageNotFoundError:
+        return 'textblob-unknown'
+
+@contextmanager
+def _sentiment_cache():
+    """
+    Opens the persistent sentiment cache.
+    
+    Yields:
+        sqlite3.Connection: Connection to the cache database
+    """
+    os.makedirs(os.path.dirname(SENTIMENT_CACHE_FILE) or '.', exist_ok=True)
+    with closing(sqlite3.connect(SENTIMENT_CACHE_FILE)) as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS sentiment_cache (key TEXT PRIMARY KEY, polarity REAL NOT NULL, "
+                     "subjectivity REAL NOT NULL, last_used REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS sentiment_cache_last_used ON sentiment_cache (last_used)")
+        yield conn
+
+def _cached_scores(keys):
+    """
+    Looks up cached scores and marks them as recently used.
+    
+    Args:
+        keys (list): Cache keys
+        
+    Returns:
+        dict: key -> (polarity, subjectivity) for the keys found
+    """
+    found = {}
+    with _sentiment_cache() as conn, conn:
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            found.update((key, (polarity, subjectivity)) for key, polarity, subjectivity in conn.execute(
+                f"SELECT key, polarity, subjectivity FROM sentiment_cache WHERE key IN ({placeholders})", chunk))
+            conn.execute(f"UPDATE sentiment_cache SET last_used = ? WHERE key IN ({placeholders})",
+                         [time.time(), *chunk])
+    return found
+
+def _store_scores(scores):
+    """
+    Adds scores to the cache, evicting the least recently used entries
+    once it holds more than SENTIMENT_CACHE_SIZE notes.
+    
+    Args:
+        scores (dict): key -> (polarity, subjectivity)
+    """
+    now = time.time()
+    with _sentiment_cache() as conn, conn:
+        conn.executemany("INSERT OR REPLACE INTO sentiment_cache VALUES (?, ?, ?, ?)",
+                         [(key, polarity, subjectivity, now) for key, (polarity, subjectivity) in scores.items()])
+        excess = conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0] - SENTIMENT_CACHE_SIZE
+        if excess > 0:
+            conn.execute("DELETE FROM sentiment_cache WHERE key IN "
+                         "(SELECT key FROM sentiment_cache ORDER BY last_used LIMIT ?)", (excess,))
+
+def score_sentiments(notes, workers=None, chunksize=SENTIMENT_CHUNK_SIZE, use_cache=True):
+    """
+    Scores many notes, spreading chunks across a process pool.
+    
+    Notes already in the sentiment cache are not scored again, and new
+    scores are added to it. Small inputs and workers=1 are scored in-process.
+    If the pool cannot be used (e.g. functions defined in a notebook cannot
+    be sent to spawned workers) scoring falls back to the current process.
+    
+    Args:
+        notes (iterable): Texts to analyze; missing values count as empty text
+        workers (int): Worker processes, defaults to the number of CPUs
+        chunksize (int): Notes sent to a worker at a time
+        use_cache (bool): Read and update the sentiment cache
+        
+    Returns:
+        tuple: (polarity, subjectivity) as NumPy float arrays
+    """
+    notes = [note if isinstance(note, str) else '' for note in notes]
+    if use_cache:
+        analyzer_version = _analyzer_version()
+        keys = [_sentiment_cache_key(note, analyzer_version) for note in notes]
+        cached = _cached_scores(list(dict.fromkeys(keys)))
+        missing = {key: note for key, note in zip(keys, notes) if key not in cached}
+        if missing:
+            polarity, subjectivity = score_sentiments(list(missing.values()), workers, chunksize, use_cache=False)
+            new_scores = dict(zip(missing, zip(polarity.tolist(), subjectivity.tolist())))
+            _store_scores(new_scores)
+            cached.update(new_scores)
+        scores = np.array([cached[key] for key in keys], dtype=float).reshape(-1, 2)
+        return scores[:, 0], scores[:, 1]
+    
+    chunks = [notes[start:start + chunksize] for start in range(0, len(notes), chunksize)]
+    
+    scores = None
+    if len(chunks) > 1 and workers != 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                scores = [score for chunk_scores in pool.map(_score_chunk, chunks) for score in chunk_scores]
+        except Exception as e:
+            print(f"Parallel sentiment analysis unavailable, continuing in-process: {e}")
+    if scores is None:
+        scores = [score for chunk in chunks for score in _score_chunk(chunk)]
+    
+    scores = np.array(scores, dtype=float).reshape(-1, 2)
+    return scores[:, 0], scores[:, 1]
+
+def sentiment_labels(polarity):
+    """
+    Buckets polarity scores into sentiment categories.
+    
+    Args:
+        polarity (array-like): Polarity scores in [-1, 1]
+        
+    Returns:
+        numpy.ndarray: 'Positive', 'Negative' or 'Neutral' per score
+    """
+    polarity = np.asarray(polarity, dtype=float)
+    return np.select([polarity > SENTIMENT_THRESHOLD, polarity < -SENTIMENT_THRESHOLD],
+                     ['Positive', 'Negative'], default='Neutral')
+
+def benchmark_sentiment(num_notes=20000, worker_counts=None):
+    """
+    Prints sentiment scoring throughput for different worker counts.
+    
+    Args:
+        num_notes (int): Number of synthetic notes to score
+        worker_counts (list): Worker counts to compare, defaults to 1, 2, 4, ... up to the CPU count
+    """
+    if worker_counts is None:
+        cpus = os.cpu_count() or 1
+        worker_counts = sorted({1, cpus} | {2 ** i for i in range(1, cpus.bit_length()) if 2 ** i <= cpus})
+    words = ['great', 'awful', 'calm', 'tired', 'happy', 'sad', 'long', 'productive', 'boring', 'lovely']
+    rng = random.Random(0)
+    notes = [' '.join(rng.choice(words) for _ in range(12)) + f' day {i}' for i in range(num_notes)]
+    
+    print(f"\n=== Sentiment Throughput ({num_notes} notes) ===")
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        score_sentiments(notes, workers=workers, use_cache=False)
+        rate = num_notes / (time.perf_counter() - start)
+        baseline = baseline or rate
+        print(f"{workers:>3} worker(s): {rate:,.0f} notes/s ({rate / baseline:.1f}x)")
+
+def provide_mood_tips(sentiment):
+    """
+    Provides mood improvement tips based on the sentiment.
+    
+    Args:
+        sentiment (str): The sentiment category
+    """
+    tips = {
+        'Positive': "Keep up the great work! Consider maintaining your routine to sustain your positive mood.",
+        'Neutral': "It's a balanced day. To enhance your mood, try engaging in activities you enjoy.",
+        'Negative': "I'm sorry you're feeling this way. Consider reaching out to a friend or trying a relaxation technique."
+    }
+    with _console_lock:
+        print("\n**Mood Improvement Tips:**")
+        print(tips.get(sentiment, "Stay positive!"))
+
+class SuggestionProvider:
+    """
+    Base class of the suggestion providers.
+    
+    Attributes:
+        name (str): Provider name used in SUGGESTION_PROVIDERS and cache keys
+        cacheable (bool): Whether answers may be served from the suggestion cache
+    """
+    name = None
+    cacheable = True
+    
+    def suggest(self, mood, activities, timeout=SUGGESTION_TIMEOUT):
+        """
+        Returns suggestions for a mood and the activities done today.
+        
+        Args:
+            mood (str): Current mood
+            activities (str): Comma-separated activities
+            timeout (float): Seconds to wait for an answer
+            
+        Returns:
+            str: Suggestion text
+        """
+        raise NotImplementedError
+    
+    def stream(self, mood, activities, timeout=SUGGESTION_TIMEOUT):
+        """
+        Yields suggestion text in pieces as it becomes available.
+        
+        Providers without streaming support yield the whole answer at once.
+        
+        Args:
+            mood (str): Current mood
+            activities (str): Comma-separated activities
+            timeout (float): Seconds to wait for an answer
+            
+        Yields:
+            str: Next piece of the suggestion
+        """
+        yield self.suggest(mood, activities, timeout=timeout)
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+    
+    Args:
+        rate (float): Tokens added per second
+        capacity (int): Most tokens that can build up, i.e. the allowed burst
+    """
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """
+        Blocks until a token is available and takes it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+def _is_retryable(error):
+    """
+    Tells whether a failed API call may succeed when repeated.
+    """
+    if isinstance(error, openai.APIConnectionError):  # Includes timeouts
+        return True
+    return getattr(error, 'status_code', None) in RETRYABLE_STATUS_CODES
+
+def _retry_after(error):
+    """
+    Returns the seconds the server asked us to wait (Retry-After), or None.
+    """
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers['retry-after'])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+def _backoff_delay(attempt, retry_after=None):
+    """
+    Seconds to wait before retrying, using exponential backoff with full jitter.
+    
+    The jitter spreads retries of concurrent requests apart, so they do not
+    hit a rate-limited server again all at the same moment.
+    
+    Args:
+        attempt (int): Number of the failed attempt, starting at 0
+        retry_after (float): Wait requested by the server, honoured up to SUGGESTION_BACKOFF_MAX
+        
+    Returns:
+        float: Delay in seconds
+    """
+    delay = random.uniform(0, min(SUGGESTION_BACKOFF_MAX, SUGGESTION_BACKOFF_BASE * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, SUGGESTION_BACKOFF_MAX))
+    return delay
+
+class OpenAISuggestionProvider(SuggestionProvider):
+    """
+    Suggestions from the OpenAI chat API (or any compatible server at base_url).
+    
+    Requests share a bounded connection pool, are limited to max_concurrency
+    in flight and rate_limit per second, and transient failures (connection
+    errors, timeouts, 429 and 5xx answers) are retried with backoff.
+    
+    Attributes:
+        retries (int): Retries made so far
+    """
+    name = 'openai'
+    
+    def __init__(self, api_key=None, base_url=None, model='gpt-3.5-turbo',
+                 max_concurrency=SUGGESTION_MAX_CONCURRENCY, rate_limit=SUGGESTION_RATE_LIMIT):
+        self.api_key = api_key or OPENAI_API_KEY or None
+        self.base_url = base_url or OPENAI_BASE_URL
+        self.model = model
+        self.retries = 0
+        self._client = None
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._bucket = TokenBucket(rate_limit, SUGGESTION_RATE_BURST) if rate_limit else None
+    
+    @property
+    def client(self):
+        """
+        The OpenAI client, created on first use.
+        
+        Retries are handled by _create, so the client's own are turned off.
+        """
+        if self._client is None:
+            limits = httpx.Limits(max_connections=SUGGESTION_MAX_CONNECTIONS,
+                                  max_keepalive_connections=SUGGESTION_MAX_CONNECTIONS)
+            self._client = openai.OpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0,
+                http_client=openai.DefaultHttpxClient(limits=limits),
+            )
+        return self._client
+    
+    def _create(self, mood, activities, timeout, stream=False):
+        """
+        Sends the chat request, retrying transient failures.
+        
+        timeout bounds the whole call: every attempt only gets the time left,
+        and no retry is started that could not finish before the deadline.
+        A streamed response keeps its concurrency slot until it has been read
+        or closed; the caller must then call self._slots.release().
+        """
+        deadline = time.monotonic() + timeout
+        prompt = f"""
+        I am feeling {mood} today. I have done the following activities: {activities}. 
+        Can you provide some suggestions or activities to help me maintain or improve my mood?
+        """
+        
+        for attempt in range(SUGGESTION_MAX_RETRIES + 1):
+            if self._bucket is not None:
+                self._bucket.acquire()
+            self._slots.acquire()
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No suggestions within {timeout:g} seconds")
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    max_tokens=150,
+                    temperature=0.7,
+                    timeout=httpx.Timeout(remaining, connect=min(remaining, SUGGESTION_CONNECT_TIMEOUT)),
+                    stream=stream,
+                )
+            except Exception as e:
+                self._slots.release()
+                if attempt == SUGGESTION_MAX_RETRIES or not _is_retryable(e):
+                    raise
+                delay = _backoff_delay(attempt, _retry_after(e))
+                if time.monotonic() + delay >= deadline:
+                    raise
+                self.retries += 1
+                time.sleep(delay)
+            else:
+                if not stream:
+                    self._slots.release()
+                return response
+    
+    def suggest(self, mood, activities, timeout=SUGGESTION_TIMEOUT):
+        response = self._create(mood, activities, timeout)
+        return response.choices[0].message.content.strip()
+    
+    def stream(self, mood, activities, timeout=SUGGESTION_TIMEOUT):
+        response = self._create(mood, activities, timeout, stream=True)
+        try:
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            response.close()
+            self._slots.release()  # Held by _create while the stream is read
+
+class LocalSuggestionProvider(SuggestionProvider):
+    """
+    Offline suggestions built from the user's own history.
+    
+    Uses the activity-mood co-occurrence counts from the index to find
+    the activities that most often came with positive moods, and fills them
+    into templates. Needs no network and answers from the cached entries.
+    """
+    name = 'local'
+    cacheable = False  # answers change as the history grows
+    
+    def __init__(self, min_support=2, max_activities=3):
+        self.min_support = min_support
+        self.max_activities = max_activities
+    
+    def helpful_activities(self):
+        """
+        Returns activities ranked by how often they came with a positive mood.
+        
+        Returns:
+            list: Activity names, most positive first
+        """
+        counts = get_activity_mood_matrix().to_frame()
+        if counts.empty:
+            return []
+        totals = counts.sum(axis=1)
+        positive = counts[[mood for mood in POSITIVE_MOODS if mood in counts.columns]].sum(axis=1)
+        share = (positive / totals)[totals >= self.min_support]
+        return share[share > 0].sort_values(ascending=False, kind='stable').index.tolist()
+    
+    def suggest(self, mood, activities, timeout=SUGGESTION_TIMEOUT):
+        done_today = set(resolve_activities(activities))
+        helpful = self.helpful_activities()
+        new_ideas = [activity for activity in helpful if activity not in done_today][:self.max_activities]
+        kept = [activity for activity in helpful if activity in done_today][:self.max_activities]
+        
+        lines = []
+        if mood.title() in POSITIVE_MOODS:
+            if kept:
+                lines.append(f"Days with {', '.join(kept)} tend to be good days for you - keep them in your routine.")
+            if new_ideas:
+                lines.append(f"To keep the momentum, you could also fit in {', '.join(new_ideas)}.")
+        else:
+            if new_ideas:
+                lines.append(f"On your better days you often did {', '.join(new_ideas)}. "
+                             f"Try one of them today if you can.")
+            lines.append("Take a short break, get some fresh air, or reach out to someone you trust.")
+        if not lines:
+            lines.append("Keep logging your days - suggestions get more personal as your history grows.")
+        return '\n'.join(lines)
+
+SUGGESTION_PROVIDERS = {
+    'openai': OpenAISuggestionProvider,
+    'local': LocalSuggestionProvider,
+}
+
+def get_suggestion_provider(name=None):
+    """
+    Returns the suggestion provider to use.
+    
+    With SUGGESTION_PROVIDER = 'auto', OpenAI is used when an API key is
+    configured (OPENAI_API_KEY here or in the environment) and the local
+    provider otherwise.
+    
+    Args:
+        name (str): Provider name, defaults to SUGGESTION_PROVIDER
+        
+    Returns:
+        SuggestionProvider: Shared provider instance
+    """
+    name = name or SUGGESTION_PROVIDER
+    if name == 'auto':
+        name = 'openai' if OPENAI_API_KEY or os.environ.get('OPENAI_API_KEY') else 'local'
+    if name not in SUGGESTION_PROVIDERS:
+        raise ValueError(f"Unknown suggestion provider '{name}'. Use one of: auto, {', '.join(SUGGESTION_PROVIDERS)}")
+    if name not in _suggestion_providers:
+        _suggestion_providers[name] = SUGGESTION_PROVIDERS[name]()
+    return _suggestion_providers[name]
+
+def _suggestion_cache_key(mood, activities, provider_name):
+    """
+    Cache key for a suggestion: provider, normalized mood and the sorted set of activities.
+    """
+    activity_set = sorted(set(parse_activities(activities)))
+    return f"{provider_name}|{mood.strip().lower()}|{','.join(activity_set)}"
+
+@contextmanager
+def _suggestion_cache():
+    """
+    Opens the persistent suggestion cache.
+    
+    Yields:
+        sqlite3.Connection: Connection to the cache database
+    """
+    os.makedirs(os.path.dirname(SUGGESTION_CACHE_FILE) or '.', exist_ok=True)
+    with closing(sqlite3.connect(SUGGESTION_CACHE_FILE)) as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS suggestion_cache (key TEXT PRIMARY KEY, suggestion TEXT NOT NULL, "
+                     "created REAL NOT NULL, last_used REAL NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS suggestion_cache_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        yield conn
+
+def _cached_suggestion(key):
+    """
+    Returns a cached suggestion younger than SUGGESTION_CACHE_TTL and records
+    the hit or miss.
+    
+    Args:
+        key (str): Key from _suggestion_cache_key
+        
+    Returns:
+        str or None: Cached suggestion
+    """
+    now = time.time()
+    with _suggestion_cache() as conn, conn:
+        row = conn.execute("SELECT suggestion FROM suggestion_cache WHERE key = ? AND created > ?",
+                           (key, now - SUGGESTION_CACHE_TTL)).fetchone()
+        if row:
+            conn.execute("UPDATE suggestion_cache SET last_used = ? WHERE key = ?", (now, key))
+        conn.execute("INSERT INTO suggestion_cache_stats VALUES (?, 1) ON CONFLICT (name) DO UPDATE SET value = value + 1",
+                     ('hits' if row else 'misses',))
+    return row[0] if row else None
+
+def _store_suggestion(key, suggestion):
+    """
+    Caches a suggestion, dropping expired entries and then the least recently
+    used ones beyond SUGGESTION_CACHE_SIZE.
+    
+    Args:
+        key (str): Key from _suggestion_cache_key
+        suggestion (str): Suggestion text
+    """
+    now = time.time()
+    with _suggestion_cache() as conn, conn:
+        conn.execute("INSERT OR REPLACE INTO suggestion_cache VALUES (?, ?, ?, ?)", (key, suggestion, now, now))
+        conn.execute("DELETE FROM suggestion_cache WHERE created <= ?", (now - SUGGESTION_CACHE_TTL,))
+        excess = conn.execute("SELECT COUNT(*) FROM suggestion_cache").fetchone()[0] - SUGGESTION_CACHE_SIZE
+        if excess > 0:
+            conn.execute("DELETE FROM suggestion_cache WHERE key IN "
+                         "(SELECT key FROM suggestion_cache ORDER BY last_used LIMIT ?)", (excess,))
+
+def get_suggestion_cache_stats():
+    """
+    Returns hit/miss metrics of the suggestion cache.
+    
+    Returns:
+        dict: 'hits', 'misses', 'hit_rate' and 'entries'
+    """
+    with _suggestion_cache() as conn:
+        counts = dict(conn.execute("SELECT name, value FROM suggestion_cache_stats").fetchall())
+        entries = conn.execute("SELECT COUNT(*) FROM suggestion_cache").fetchone()[0]
+    hits, misses = counts.get('hits', 0), counts.get('misses', 0)
+    return {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'entries': entries}
+
+def fetch_suggestion(mood, activities, timeout=SUGGESTION_TIMEOUT, use_cache=True, provider=None):
+    """
+    Gets personalized suggestions from the configured suggestion provider.
+    
+    Answers of cacheable providers are cached per provider, mood and set of
+    activities, so a combination seen before costs no API call.
+    
+    Args:
+        mood (str): Current mood
+        activities (str): Activities performed
+        timeout (float): Seconds to wait for the provider
+        use_cache (bool): Read and update the suggestion cache
+        provider (SuggestionProvider): Provider to ask, defaults to get_suggestion_provider()
+        
+    Returns:
+        str: Suggestion text
+    """
+    provider = provider or get_suggestion_provider()
+    use_cache = use_cache and provider.cacheable
+    key = _suggestion_cache_key(mood, activities, provider.name)
+    if use_cache:
+        suggestion = _cached_suggestion(key)
+        if suggestion is not None:
+            return suggestion
+    
+    suggestion = provider.suggest(mood, activities, timeout=timeout)
+    if use_cache:
+        _store_suggestion(key, suggestion)
+    return suggestion
+
+def _print_suggestion(suggestion):
+    """
+    Prints a suggestion under the usual heading.
+    """
+    with _console_lock:
+        print("\n**Suggestions to Improve or Maintain Your Mood:**")
+        print(suggestion)
+
+def provide_suggestions(mood, activities):
+    """
+    Provides personalized suggestions based on mood and activities.
+    
+    Args:
+        mood (str): Current mood
+        activities (str): Activities performed
+    """
+    try:
+        _print_suggestion(fetch_suggestion(mood, activities))
+        
+    except Exception as e:
+        print(f"Error fetching suggestions: {e}")
+
+def provide_suggestions_streaming(mood, activities, timeout=SUGGESTION_TIMEOUT):
+    """
+    Prints suggestions token by token as the provider streams them.
+    
+    Records the time to first token of streamed answers (see
+    get_suggestion_metrics). A cached answer is printed at once and not
+    counted; a streamed answer is added to the cache.
+    
+    Args:
+        mood (str): Current mood
+        activities (str): Activities performed
+        timeout (float): Seconds to wait for the provider
+    """
+    provider = get_suggestion_provider()
+    key = _suggestion_cache_key(mood, activities, provider.name)
+    start = time.perf_counter()
+    
+    try:
+        cached = _cached_suggestion(key) if provider.cacheable else None
+        pieces = [cached] if cached is not None else provider.stream(mood, activities, timeout=timeout)
+        
+        with _console_lock:
+            print("\n**Suggestions to Improve or Maintain Your Mood:**")
+            text = ''
+            first = True
+            for piece in pieces:
+                if first and cached is None:
+                    _record_time_to_first_token(time.perf_counter() - start)
+                first = False
+                if not text:
+                    piece = piece.lstrip()
+                text += piece
+                print(piece, end='', flush=True)
+            print()
+        
+        if cached is None and provider.cacheable and text.strip():
+            _store_suggestion(key, text.strip())
+            
+    except Exception as e:
+        print(f"\nError fetching suggestions: {e}")
+
+def _record_time_to_first_token(seconds):
+    """
+    Adds a time-to-first-token measurement to the suggestion metrics.
+    """
+    with _suggestions_lock:
+        _suggestion_metrics['streams'] += 1
+        _suggestion_metrics['last_ttft'] = seconds
+        _suggestion_metrics['total_ttft'] += seconds
+
+def get_suggestion_metrics():
+    """
+    Returns time-to-first-token metrics of streamed suggestions in this session.
+    
+    Returns:
+        dict: 'streams' (count), 'last_ttft' and 'avg_ttft' in seconds (None before the first stream)
+    """
+    with _suggestions_lock:
+        streams = _suggestion_metrics['streams']
+        return {
+            'streams': streams,
+            'last_ttft': _suggestion_metrics['last_ttft'],
+            'avg_ttft': _suggestion_metrics['total_ttft'] / streams if streams else None,
+        }
+
+def provide_suggestions_async(mood, activities, timeout=SUGGESTION_TIMEOUT):
+    """
+    Fetches suggestions on a background thread and prints them once ready,
+    so the caller can return to the menu immediately.
+    
+    Args:
+        mood (str): Current mood
+        activities (str): Activities performed
+        timeout (float): Seconds before the request is abandoned
+        
+    Returns:
+        concurrent.futures.Future: Resolves to the suggestion text; cancel it
+        (or call cancel_pending_suggestions) to discard the result
+    """
+    future = Future()
+    
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fetch_suggestion(mood, activities, timeout))
+        except Exception as e:
+            future.set_exception(e)
+    
+    def report(done):
+        with _suggestions_lock:
+            _pending_suggestions.discard(done)
+            if done in _cancelled_suggestions:
+                _cancelled_suggestions.discard(done)
+                return
+        if done.cancelled():
+            return
+        try:
+            _print_suggestion(done.result())
+        except Exception as e:
+            with _console_lock:
+                print(f"\nError fetching suggestions: {e}")
+    
+    with _suggestions_lock:
+        _pending_suggestions.add(future)
+    future.add_done_callback(report)
+    # Daemon thread: leaving the app never waits for an outstanding request
+    threading.Thread(target=run, name='mood-suggestion', daemon=True).start()
+    return future
+
+def cancel_pending_suggestions():
+    """
+    Discards all suggestions that have not been printed yet.
+    """
+    with _suggestions_lock:
+        for future in _pending_suggestions:
+            if not future.cancel():
+                _cancelled_suggestions.add(future)
+        _pending_suggestions.clear()
+
+@contextmanager
+def _entry_suggestions():
+    """
+    Opens the database of suggestions stored for past entries.
+    
+    Yields:
+        sqlite3.Connection: Connection to the database
+    """
+    os.makedirs(os.path.dirname(SUGGESTIONS_FILE) or '.', exist_ok=True)
+    with closing(sqlite3.connect(SUGGESTIONS_FILE)) as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS entry_suggestions (date TEXT PRIMARY KEY, mood TEXT NOT NULL, "
+                     "activities TEXT NOT NULL, provider TEXT NOT NULL, suggestion TEXT NOT NULL, created REAL NOT NULL)")
+        yield conn
+
+def get_entry_suggestions(start_date=None, end_date=None):
+    """
+    Returns the suggestions stored for past entries.
+    
+    Args:
+        start_date (str): First date (YYYY-MM-DD), or None for no lower bound
+        end_date (str): Last date (YYYY-MM-DD), or None for no upper bound
+        
+    Returns:
+        pandas.DataFrame: Date, Mood, Activities, Provider and Suggestion, by date
+    """
+    with _entry_suggestions() as conn:
+        rows = conn.execute("SELECT date, mood, activities, provider, suggestion FROM entry_suggestions "
+                            "WHERE date >= ? AND date <= ? ORDER BY date",
+                            (start_date or '', end_date or '9999-12-31')).fetchall()
+    df = pd.DataFrame(rows, columns=['Date', 'Mood', 'Activities', 'Provider', 'Suggestion'])
+    df['Date'] = pd.to_datetime(df['Date'], format=DATE_FORMAT)
+    return df
+
+async def _generate_suggestions(conn, entries, provider, concurrency, progress):
+    """
+    Fetches suggestions for entries concurrently and stores each one as it arrives.
+    
+    Args:
+        conn (sqlite3.Connection): Connection from _entry_suggestions
+        entries (list): (date, mood, activities) tuples
+        provider (SuggestionProvider): Provider to ask
+        concurrency (int): Most requests in flight at once
+        progress (bool): Print a progress line
+        
+    Returns:
+        dict: Number of suggestions 'generated' and 'failed'
+    """
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+    counts = {'generated': 0, 'failed': 0}
+    
+    async def generate(executor, date, mood, activities):
+        async with slots:
+            try:
+                suggestion = await loop.run_in_executor(
+                    executor, partial(fetch_suggestion, mood, activities, provider=provider))
+            except Exception as e:
+                counts['failed'] += 1
+                print(f"\nError fetching suggestions for {date}: {e}")
+            else:
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO entry_suggestions VALUES (?, ?, ?, ?, ?, ?)",
+                                 (date, mood, activities, provider.name, suggestion, time.time()))
+                counts['generated'] += 1
+        if progress:
+            print(f"\rSuggestions: {counts['generated'] + counts['failed']}/{len(entries)} "
+                  f"({counts['failed']} failed)", end='', flush=True)
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        await asyncio.gather(*(generate(executor, *entry) for entry in entries))
+    if progress and entries:
+        print()
+    return counts
+
+def generate_suggestions(start_date=None, end_date=None, concurrency=SUGGESTION_MAX_CONCURRENCY,
+                         provider=None, progress=True):
+    """
+    Generates and stores suggestions for all past entries in a date range.
+    
+    Entries that already have a stored suggestion for their current mood and
+    activities are skipped, so running it again only fills in what is missing
+    (including entries changed since). Failed requests are reported and can be
+    retried by running it again.
+    
+    Args:
+        start_date (str): First date (YYYY-MM-DD), or None for the earliest entry
+        end_date (str): Last date (YYYY-MM-DD), or None for the latest entry
+        concurrency (int): Most requests in flight at once
+        provider (SuggestionProvider): Provider to ask, defaults to get_suggestion_provider()
+        progress (bool): Print a progress line
+        
+    Returns:
+        dict: Number of suggestions 'generated', 'skipped' (already stored) and 'failed'
+    """
+    provider = provider or get_suggestion_provider()
+    df = get_all_entries(['Date', 'Mood', 'Activities'])
+    if df.empty:
+        return {'generated': 0, 'skipped': 0, 'failed': 0}
+    if start_date is not None:
+        df = df[df['Date'] >= pd.Timestamp(start_date)]
+    if end_date is not None:
+        df = df[df['Date'] <= pd.Timestamp(end_date)]
+    
+    entries = list(zip(_date_strings(df['Date']), df['Mood'].astype(str),
+                       df['Activities'].astype(object).fillna('').astype(str)))
+    run = partial(_fill_suggestions, entries, provider, max(1, concurrency), progress)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        counts = run()
+    else:
+        # Called from a running event loop (e.g. in Jupyter), where asyncio.run
+        # is not allowed: run on a thread of its own with a fresh loop
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            counts = executor.submit(run).result()
+    counts['skipped'] = len(df) - counts.pop('missing')
+    return counts
+
+def _fill_suggestions(entries, provider, concurrency, progress):
+    """
+    Generates and stores suggestions for the entries that have none yet.
+    
+    Opens its own connection and event loop, so it can run on any thread.
+    
+    Returns:
+        dict: Number of suggestions 'generated' and 'failed', and of entries 'missing' one
+    """
+    with _entry_suggestions() as conn:
+        stored = set(conn.execute("SELECT date, mood, activities FROM entry_suggestions"))
+        missing = [entry for entry in entries if entry not in stored]
+        counts = asyncio.run(_generate_suggestions(conn, missing, provider, concurrency, progress))
+    counts['missing'] = len(missing)
+    return counts
+
+class StorageBackend:
+    """
+    Base class of the storage backends.
+    
+    Every backend appends new rows to a CSV write log (log_path). Columnar
+    backends additionally keep a base file at `path` that the log is folded
+    into during compaction. Reads return base rows followed by log rows,
+    including superseded ones.
+    """
+    name = None
+    
+    def __init__(self, path):
+        self.path = path
+        self.log_path = path
+    
+    def base_signature(self):
+        """
+        Returns the signature of the base file, or None if there is none.
+        """
+        return None
+    
+    def read_base(self, columns=None):
+        """
+        Reads the base file, or returns None if there is none.
+        """
+        return None
+    
+    def read(self, columns=None, log_limit=None):
+        """
+        Reads raw rows from the base file and the write log.
+        
+        Args:
+            columns (list): Columns to load, or None for all
+            log_limit (int): Only read this many bytes of the write log
+            
+        Returns:
+            pandas.DataFrame: Rows in write order, with the declared schema
+        """
+        with open(self.log_path, 'rb') as f:
+            data = f.read() if log_limit is None else f.read(log_limit)
+        # An unterminated row at the end (e.g. torn by a crash) is left out, as the index leaves it out
+        data = data[:data.rfind(b'\n') + 1] or data
+        try:
+            df = pd.read_csv(io.BytesIO(data), usecols=columns)
+        except pd.errors.ParserError:
+            # The last newline is inside the quotes of the unterminated row: find the last complete row
+            end = 0
+            for _, _, end in _log_rows(data, 0):
+                pass
+            df = pd.read_csv(io.BytesIO(data[:end]), usecols=columns)
+        base_df = self.read_base(columns)
+        if base_df is not None:
+            df = pd.concat([base_df, df], ignore_index=True)
+        return _apply_schema(df)
+    
+    def stage(self, df):
+        """
+        Writes compacted rows next to the stored files, without replacing them.
+        
+        Args:
+            df (pandas.DataFrame): Compacted rows
+            
+        Returns:
+            StorageBackend: Backend reading the staged files
+        """
+        staged = type(self)(self.path + '.compact')
+        df.to_csv(staged.log_path, index=False, date_format=DATE_FORMAT)
+        return staged
+    
+    def commit(self, staged, log_tail):
+        """
+        Atomically replaces the stored files with staged ones.
+        
+        Args:
+            staged (StorageBackend): Backend returned by stage
+            log_tail (bytes): Log rows written after the compaction snapshot
+        """
+        with open(staged.log_path, 'ab') as f:
+            f.write(log_tail)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(staged.log_path, self.log_path)
+
+class CsvBackend(StorageBackend):
+    """
+    Stores all entries in one CSV file that doubles as the write log.
+    """
+    name = 'csv'
+
+class ColumnarBackend(StorageBackend):
+    """
+    Stores compacted entries in a columnar file with a CSV write log next to it.
+    """
+    def __init__(self, path):
+        super().__init__(path)
+        self.log_path = path + '.log.csv'
+    
+    def base_signature(self):
+        if not os.path.exists(self.path):
+            return None
+        return _file_signature(self.path)
+    
+    def read_base(self, columns=None):
+        if not os.path.exists(self.path):
+            return None
+        return self._read_file(self.path, columns)
+    
+    def stage(self, df):
+        staged = type(self)(self.path + '.compact')
+        self._write_file(df.reset_index(drop=True), staged.path)
+        with open(staged.log_path, 'wb') as f:
+            f.write((','.join(DATA_COLUMNS) + '\n').encode('utf-8'))
+        return staged
+    
+    def commit(self, staged, log_tail):
+        os.replace(staged.path, self.path)
+        super().commit(staged, log_tail)
+
+class ParquetBackend(ColumnarBackend):
+    """
+    Parquet storage (requires pyarrow).
+    """
+    name = 'parquet'
+    
+    def _read_file(self, path, columns):
+        return pd.read_parquet(path, columns=columns)
+    
+    def _write_file(self, df, path):
+        df.to_parquet(path, index=False)
+
+class FeatherBackend(ColumnarBackend):
+    """
+    Feather / Arrow IPC storage (requires pyarrow).
+    """
+    name = 'feather'
+    
+    def _read_file(self, path, columns):
+        return pd.read_feather(path, columns=columns)
+    
+    def _write_file(self, df, path):
+        df.to_feather(path)
+
+STORAGE_BACKENDS = {
+    'csv': CsvBackend,
+    'parquet': ParquetBackend,
+    'feather': FeatherBackend,
+}
+
+STORAGE_EXTENSIONS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather',
+}
+
+def get_storage_backend():
+    """
+    Returns the storage backend for DATA_FILE.
+    
+    STORAGE_BACKEND takes precedence; otherwise the backend is picked from
+    the file extension, falling back to CSV.
+    
+    Returns:
+        StorageBackend: Backend instance for DATA_FILE
+    """
+    name = STORAGE_BACKEND or STORAGE_EXTENSIONS.get(os.path.splitext(DATA_FILE)[1].lower(), 'csv')
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}'. Use one of: {', '.join(STORAGE_BACKENDS)}")
+    return STORAGE_BACKENDS[name](DATA_FILE)
+
+def _ensure_log(backend):
+    """
+    Creates the data directory and an empty write log with a header if missing.
+    
+    Args:
+        backend (StorageBackend): Active storage backend
+    """
+    if not os.path.exists(backend.log_path):
+        os.makedirs(os.path.dirname(backend.log_path) or '.', exist_ok=True)
+        pd.DataFrame(columns=DATA_COLUMNS).to_csv(backend.log_path, index=False)
+
+def _apply_schema(df):
+    """
+    Converts loaded entries to the declared dtypes.
+    
+    Moods outside COMMON_MOODS (e.g. from older data) are kept as extra
+    categories rather than dropped.
+    
+    Args:
+        df (pandas.DataFrame): Entries with any subset of DATA_COLUMNS
+        
+    Returns:
+        pandas.DataFrame: The same DataFrame with normalized dtypes
+    """
+    if 'Date' in df:
+        # Rows without a valid date (e.g. left torn by a crash) are dropped, as the index skips them
+        dates = pd.to_datetime(df['Date'], format=DATE_FORMAT, errors='coerce')
+        if dates.isna().any():
+            df = df[dates.notna()].copy()
+            dates = dates[dates.notna()]
+        df['Date'] = dates.astype('datetime64[s]')
+    for column, categories in (('Mood', MOOD_CATEGORIES), ('Sentiment', SENTIMENT_CATEGORIES)):
+        if column in df:
+            extra = sorted(set(df[column].dropna()) - set(categories))
+            df[column] = pd.Categorical(df[column], categories=categories + extra)
+    if 'Activities' in df:
+        df['Activities'] = df['Activities'].astype('category')
+    return df
+
+def _date_strings(dates):
+    """
+    Formats a Series of dates as YYYY-MM-DD strings.
+    """
+    return pd.to_datetime(dates, format=DATE_FORMAT).dt.strftime(DATE_FORMAT)
+
+def _latest_entries(df):
+    """
+    Resolves superseding records: for every date only the last written row is kept.
+    
+    Args:
+        df (pandas.DataFrame): Raw rows in log order
+        
+    Returns:
+        pandas.DataFrame: One row per date
+    """
+    if df.empty:
+        return df
+    return df.drop_duplicates(subset='Date', keep='last').reset_index(drop=True)
+
+def _append_entries(new_df):
+    """
+    Appends rows to the end of the write log without rewriting existing data,
+    then brings the date index up to date with the new rows.
+    
+    An unterminated row at the end of the log (left by a crash during an
+    earlier append) is cut off first, so it never becomes an entry.
+    
+    Args:
+        new_df (pandas.DataFrame): Rows to append, with DATA_COLUMNS
+    """
+    payload = new_df[DATA_COLUMNS].to_csv(header=False, index=False).encode('utf-8')
+    backend = get_storage_backend()
+    with _storage_lock:
+        _ensure_log(backend)
+        with _index_connection() as conn:
+            complete = conn.execute("SELECT value FROM meta WHERE key = 'log_size'").fetchone()[0]
+        with open(backend.log_path, 'r+b') as f:
+            f.truncate(complete)
+            f.seek(complete)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        invalidate_entries_cache()
+        invalidate_chart_cache()
+        _sync_date_index()
+
+# Bytes before the indexed end of the write log that the index checksums to
+# tell appended rows from an edit that made the log longer
+LOG_CHECKSUM_BYTES = 4096
+
+# Layout version of the index database; a mismatch drops and rebuilds it
+INDEX_VERSION = 9
+
+# Tables of the index database: the date index itself plus the aggregates
+# that are maintained incrementally alongside it
+INDEX_TABLES = {
+    'entries_index': "date TEXT PRIMARY KEY, offset INTEGER NOT NULL, mood TEXT, sentiment TEXT, "
+                     "activity_count INTEGER, weekday INTEGER",
+    'entry_activities': "date TEXT, activity_id INTEGER, PRIMARY KEY (date, activity_id)",
+    'meta': "key TEXT PRIMARY KEY, value INTEGER",
+    'mood_stats': "mood TEXT PRIMARY KEY, entries INTEGER NOT NULL, activity_entries INTEGER NOT NULL, "
+                  "activity_total INTEGER NOT NULL",
+    'sentiment_stats': "sentiment TEXT PRIMARY KEY, entries INTEGER NOT NULL",
+    'activity_mood_stats': "activity_id INTEGER, mood TEXT, entries INTEGER NOT NULL, "
+                           "PRIMARY KEY (activity_id, mood)",
+    'weekday_sentiment_stats': "weekday INTEGER, sentiment TEXT, entries INTEGER NOT NULL, "
+                               "PRIMARY KEY (weekday, sentiment)",
+    'streak_state': "id INTEGER PRIMARY KEY CHECK (id = 0), last_date TEXT, current_run INTEGER, "
+                    "longest_run INTEGER, last_negative TEXT, prev_run INTEGER, prev_longest INTEGER, "
+                    "prev_last_negative TEXT, prev_last_date TEXT",
+}
+
+# Tables of the activity vocabulary, which outlives index rebuilds: canonical
+# activities, every spelling (alias) that maps to one, the name itself included,
+# and a random identity the index records to notice a deleted or replaced vocabulary
+VOCABULARY_TABLES = {
+    'activities': "id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL",
+    'activity_aliases': "alias TEXT PRIMARY KEY, activity_id INTEGER NOT NULL",
+    'identity': "id INTEGER PRIMARY KEY CHECK (id = 0), value INTEGER NOT NULL",
+}
+
+# Positive-sentiment streak state kept in the index, see _update_streaks
+STREAK_FIELDS = ['last_date', 'current_run', 'longest_run', 'last_negative',
+                 'prev_run', 'prev_longest', 'prev_last_negative', 'prev_last_date']
+EMPTY_STREAK_STATE = {'last_date': None, 'current_run': 0, 'longest_run': 0, 'last_negative': None,
+                      'prev_run': 0, 'prev_longest': 0, 'prev_last_negative': None, 'prev_last_date': None}
+
+def _index_path():
+    """
+    Returns the path of the persistent date index stored next to DATA_FILE.
+    """
+    return DATA_FILE + '.idx'
+
+def _vocabulary_path():
+    """
+    Returns the path of the activity vocabulary stored next to DATA_FILE.
+    """
+    return DATA_FILE + '.vocab'
+
+@contextmanager
+def _index_connection():
+    """
+    Opens the date index and makes sure it matches the stored data.
+    
+    The index maps each Date to the byte offset of its latest row in the
+    write log (-1 for rows in a columnar base file) and records how many
+    bytes of the log it covers. Rows written after that point (e.g. after a
+    crash between the append and the index update) are indexed on open; if
+    the log was replaced, truncated or edited (the index checksums the bytes
+    before its end to notice edits), the base file changed, or the
+    activity vocabulary is not the one the index was built with, the index
+    is rebuilt. Aggregates in the same database are updated in
+    the same transaction, so they always describe the indexed rows. The
+    activity vocabulary is attached as the 'vocab' schema.
+    
+    Yields:
+        sqlite3.Connection: Connection to the synchronized index
+    """
+    backend = get_storage_backend()
+    with _storage_lock:
+        _ensure_log(backend)
+        with closing(_open_index(_index_path())) as conn:
+            _sync_index(conn, backend)
+            yield conn
+
+def _sync_date_index():
+    """
+    Brings the date index up to date with the stored data, e.g. right after
+    a write, so later reads find it current.
+    """
+    backend = get_storage_backend()
+    with _storage_lock:
+        _ensure_log(backend)
+        with closing(_open_index(_index_path())) as conn:
+            _sync_index(conn, backend)
+
+def _open_index(path):
+    """
+    Opens an index database with the activity vocabulary attached.
+    
+    The vocabulary uses write-ahead logging, so an index being built in the
+    background (see compact_storage) does not block writers that read it.
+    
+    Args:
+        path (str): Path of the index database
+        
+    Returns:
+        sqlite3.Connection: Connection with the index tables created
+    """
+    conn = sqlite3.connect(path)
+    conn.execute("ATTACH DATABASE ? AS vocab", (_vocabulary_path(),))
+    conn.execute("PRAGMA vocab.journal_mode = WAL")
+    for table, columns in VOCABULARY_TABLES.items():
+        conn.execute(f"CREATE TABLE IF NOT EXISTS vocab.{table} ({columns})")
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO vocab.identity (id, value) VALUES (0, ?)",
+                     (int.from_bytes(os.urandom(8), 'big') >> 1,))
+    _create_index_tables(conn)
+    return conn
+
+def _create_index_tables(conn):
+    """
+    Creates the index tables, dropping tables from an older layout first.
+    
+    Args:
+        conn (sqlite3.Connection): Open index connection
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+        with conn:
+            tables = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+            for (table,) in tables:
+                conn.execute(f"DROP TABLE {table}")
+            conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+    for table, columns in INDEX_TABLES.items():
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
+    conn.execute("CREATE INDEX IF NOT EXISTS entry_activities_by_id ON entry_activities (activity_id)")
+
+def _sync_index(conn, backend):
+    """
+    Indexes rows appended since the last sync, or rebuilds the index when stale.
+    
+    Args:
+        conn (sqlite3.Connection): Open index connection
+        backend (StorageBackend): Active storage backend
+    """
+    stat = os.stat(backend.log_path)
+    base_signature = backend.base_signature()
+    base_mtime = base_signature[2] if base_signature else 0
+    vocabulary_id = conn.execute("SELECT value FROM vocab.identity").fetchone()[0]
+    meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+    indexed_size = meta.get('log_size', 0)
+    
+    edited_in_place = stat.st_size == indexed_size and meta.get('log_mtime') != stat.st_mtime_ns
+    # An edit that grew the log shifts the bytes before the indexed end, unlike an append
+    edited_and_grown = (stat.st_size > indexed_size and 'log_size' in meta
+                        and meta.get('log_checksum') != _log_checksum(backend.log_path, indexed_size))
+    if (meta.get('log_inode') != stat.st_ino or stat.st_size < indexed_size or edited_in_place or edited_and_grown
+            or meta.get('base_mtime', 0) != base_mtime or meta.get('vocabulary_id') != vocabulary_id):
+        with conn:
+            for table in INDEX_TABLES:
+                conn.execute(f"DELETE FROM {table}")
+        indexed_size = 0
+        meta = {}
+    if stat.st_size == indexed_size and 'log_size' in meta:
+        return
+    
+    records = []
+    if not meta and base_signature:
+        base = backend.read_base(['Date', 'Mood', 'Activities', 'Sentiment'])
+        dates = _date_strings(base['Date'])
+        base = base.astype(object).where(base.notna(), None)
+        for date, mood, activities, sentiment in zip(dates, base['Mood'], base['Activities'], base['Sentiment']):
+            records.append(_index_record(date, -1, mood, activities, sentiment))
+    base_rows = len(records)
+    
+    with open(backend.log_path, 'rb') as f:
+        f.seek(indexed_size)
+        chunk = f.read()
+    
+    offset = indexed_size
+    for row_offset, fields, offset in _log_rows(chunk, indexed_size):
+        if row_offset == 0:
+            continue  # header
+        row = dict(zip(DATA_COLUMNS, fields))
+        record = _index_record(row.get('Date', ''), row_offset, row.get('Mood'), row.get('Activities'),
+                               row.get('Sentiment'))
+        if record is not None:
+            records.append(record)
+    
+    with conn:
+        new_dates = _apply_index_records(conn, records)
+        conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+            ('log_size', offset),
+            ('log_checksum', _log_checksum(backend.log_path, offset)),
+            ('log_inode', stat.st_ino),
+            ('log_mtime', stat.st_mtime_ns),
+            ('base_mtime', base_mtime),
+            ('vocabulary_id', vocabulary_id),
+            ('row_count', meta.get('row_count', 0) + len(records)),
+            ('entry_count', meta.get('entry_count', 0) + new_dates),
+            ('log_rows', meta.get('log_rows', 0) + len(records) - base_rows),
+        ])
+
+def _log_checksum(path, end):
+    """
+    Checksums the last LOG_CHECKSUM_BYTES bytes of the log before an offset.
+    
+    Args:
+        path (str): Write log path
+        end (int): Offset just past the checksummed bytes
+        
+    Returns:
+        int: Checksum that fits an SQLite integer
+    """
+    with open(path, 'rb') as f:
+        f.seek(max(0, end - LOG_CHECKSUM_BYTES))
+        data = f.read(min(end, LOG_CHECKSUM_BYTES))
+    return int.from_bytes(hashlib.blake2b(data, digest_size=7).digest(), 'big')
+
+def _log_rows(data, start):
+    """
+    Splits write-log bytes into CSV rows, keeping track of their byte offsets.
+    
+    A row ends at a newline outside quotes, so quoted fields may contain
+    newlines. An unterminated row at the end (e.g. one still being written)
+    is left out and picked up by a later sync.
+    
+    Args:
+        data (bytes): Log contents starting at a row boundary
+        start (int): Byte offset of data in the log
+        
+    Yields:
+        tuple: (offset of the row, list of fields, offset just past the row)
+    """
+    row_start = position = 0
+    quotes = 0
+    for line in data.splitlines(keepends=True):
+        position += len(line)
+        quotes += line.count(b'"')
+        if quotes % 2 or not line.endswith(b'\n'):
+            continue  # the row goes on past this line
+        raw = data[row_start:position]
+        if raw.strip():
+            yield start + row_start, next(csv.reader(io.StringIO(raw.decode('utf-8', errors='replace')))), start + position
+        else:
+            yield start + row_start, [], start + position
+        row_start = position
+        quotes = 0
+
+def _index_record(date, offset, mood, activities, sentiment):
+    """
+    Builds the index row for one stored entry.
+    
+    Args:
+        date (str): Date in YYYY-MM-DD format
+        offset (int): Byte offset of the row in the write log, -1 if in the base file
+        mood (str): Mood, or None
+        activities (str): Comma-separated activities, or None
+        sentiment (str): Sentiment category, or None
+        
+    Returns:
+        tuple: (date, offset, mood, sentiment, activity_count, weekday, activity
+        names), or None for a malformed row (e.g. left torn by a crash), which
+        is skipped like get_all_entries skips it; _apply_index_records
+        replaces the names by their IDs (stored in entry_activities) and sets
+        activity_count to the number of distinct activities (None if there
+        are none)
+    """
+    try:
+        weekday = datetime.strptime(date, DATE_FORMAT).weekday()
+    except (TypeError, ValueError):
+        return None
+    return (date, offset, mood or None, sentiment or None, None, weekday, tuple(parse_activities(activities)))
+
+def normalize_activity(name):
+    """
+    Normalizes the spelling of an activity: lowercase, single spaces, no padding.
+    """
+    return ' '.join(str(name).lower().split())
+
+def parse_activities(activities):
+    """
+    Splits a comma-separated activity string into distinct normalized names.
+    
+    Args:
+        activities (str): Comma-separated activities, or None
+        
+    Returns:
+        list: Activity names in their original order, empty ones dropped
+    """
+    if not isinstance(activities, str):
+        return []
+    return list(dict.fromkeys(filter(None, map(normalize_activity, activities.split(',')))))
+
+def _intern_activities(conn, names):
+    """
+    Maps activity names to their integer IDs, adding new names to the vocabulary.
+    
+    Aliases resolve to the ID of the activity they were merged into.
+    
+    Args:
+        conn (sqlite3.Connection): Open index connection, inside a transaction
+        names (set): Normalized activity names
+        
+    Returns:
+        dict: Activity ID by name
+    """
+    def lookup(names):
+        ids = {}
+        for i in range(0, len(names), 500):
+            chunk = names[i:i + 500]
+            query = f"SELECT alias, activity_id FROM vocab.activity_aliases WHERE alias IN ({', '.join('?' * len(chunk))})"
+            ids.update(conn.execute(query, chunk))
+        return ids
+    
+    ids = lookup(list(names))
+    # Only write to the vocabulary for new names, so index rebuilds over known ones leave it unlocked
+    missing = [name for name in names if name not in ids]
+    if missing:
+        conn.executemany("INSERT OR IGNORE INTO vocab.activities (name) SELECT ? WHERE NOT EXISTS "
+                         "(SELECT 1 FROM vocab.activity_aliases WHERE alias = ?)", [(name, name) for name in missing])
+        conn.executemany("INSERT OR IGNORE INTO vocab.activity_aliases SELECT name, id FROM vocab.activities "
+                         "WHERE name = ?", [(name,) for name in missing])
+        ids.update(lookup(missing))
+    return ids
+
+def merge_activities(alias, target):
+    """
+    Merges an activity into another, e.g. 'jog' into 'jogging'.
+    
+    The alias resolves to the target from now on, in past entries too: the
+    index aggregates are rebuilt with the merged IDs. If the alias is a
+    canonical activity, every spelling already merged into it moves along;
+    a spelling merged into some other activity moves alone. The stored
+    entries are not rewritten.
+    
+    Args:
+        alias (str): Activity to merge away
+        target (str): Activity to merge it into
+    """
+    alias, target = normalize_activity(alias), normalize_activity(target)
+    with _index_connection() as conn:
+        with conn:
+            ids = _intern_activities(conn, {alias, target})
+            if ids[alias] == ids[target]:
+                return
+            canonical = conn.execute("SELECT 1 FROM vocab.activities WHERE id = ? AND name = ?",
+                                     (ids[alias], alias)).fetchone()
+            if canonical:
+                conn.execute("UPDATE vocab.activity_aliases SET activity_id = ? WHERE activity_id = ?",
+                             (ids[target], ids[alias]))
+                conn.execute("DELETE FROM vocab.activities WHERE id = ?", (ids[alias],))
+            else:
+                conn.execute("UPDATE vocab.activity_aliases SET activity_id = ? WHERE alias = ?",
+                             (ids[target], alias))
+            conn.execute("DELETE FROM meta")  # Forces a rebuild with the merged IDs
+        _sync_index(conn, get_storage_backend())
+        _vocabulary_merges[0] += 1
+    invalidate_chart_cache()
+
+def get_activity_vocabulary():
+    """
+    Returns the activity vocabulary.
+    
+    Returns:
+        dict: Sorted list of aliases merged into each canonical activity name
+    """
+    with _index_connection() as conn:
+        rows = conn.execute("SELECT a.name, s.alias FROM vocab.activities a "
+                            "JOIN vocab.activity_aliases s ON s.activity_id = a.id ORDER BY a.name, s.alias").fetchall()
+    vocabulary = {}
+    for name, alias in rows:
+        vocabulary.setdefault(name, [])
+        if alias != name:
+            vocabulary[name].append(alias)
+    return vocabulary
+
+def resolve_activities(activities):
+    """
+    Maps activities to their canonical names, following merged aliases.
+    
+    Args:
+        activities (str): Comma-separated activities
+        
+    Returns:
+        list: Distinct canonical names; unknown activities keep their normalized name
+    """
+    names = parse_activities(activities)
+    if not names:
+        return []
+    with _index_connection() as conn:
+        query = (f"SELECT s.alias, a.name FROM vocab.activity_aliases s JOIN vocab.activities a "
+                 f"ON a.id = s.activity_id WHERE s.alias IN ({', '.join('?' * len(names))})")
+        canonical = dict(conn.execute(query, names))
+    return list(dict.fromkeys(canonical.get(name, name) for name in names))
+
+def _apply_index_records(conn, records):
+    """
+    Indexes rows in write order and updates the aggregates incrementally.
+    
+    A row for an already indexed date supersedes it: the old row's
+    contribution is subtracted from the aggregates before the new one is added.
+    
+    Args:
+        conn (sqlite3.Connection): Open index connection, inside a transaction
+        records (list): Tuples built by _index_record
+        
+    Returns:
+        int: Number of dates that were not indexed before
+    """
+    ids = _intern_activities(conn, {name for record in records for name in record[6]})
+    resolved = []
+    for date, offset, mood, sentiment, _, weekday, names in records:
+        activity_ids = tuple(dict.fromkeys(ids[name] for name in names))
+        resolved.append((date, offset, mood, sentiment, len(activity_ids) or None, weekday, activity_ids))
+    records = resolved
+    dates = list(dict.fromkeys(record[0] for record in records))
+    current = {}
+    for i in range(0, len(dates), 500):
+        chunk = dates[i:i + 500]
+        placeholders = ', '.join('?' * len(chunk))
+        previous_ids = defaultdict(list)
+        for date, activity_id in conn.execute(
+                f"SELECT date, activity_id FROM entry_activities WHERE date IN ({placeholders})", chunk):
+            previous_ids[date].append(activity_id)
+        for row in conn.execute(f"SELECT * FROM entries_index WHERE date IN ({placeholders})", chunk):
+            current[row[0]] = (*row, tuple(previous_ids[row[0]]))
+    superseded = list(current)
+    
+    mood_delta = defaultdict(lambda: [0, 0, 0])
+    sentiment_delta = Counter()
+    weekday_delta = Counter()
+    activity_delta = Counter()
+    
+    def contribute(record, sign):
+        _, _, mood, sentiment, activity_count, weekday, activity_ids = record
+        if mood is not None:
+            mood_delta[mood][0] += sign
+            if activity_count is not None:
+                mood_delta[mood][1] += sign
+                mood_delta[mood][2] += sign * activity_count
+            for activity_id in activity_ids:
+                activity_delta[(activity_id, mood)] += sign
+        if sentiment is not None:
+            sentiment_delta[sentiment] += sign
+            weekday_delta[(weekday, sentiment)] += sign
+    
+    for record in records:
+        previous = current.get(record[0])
+        if previous is not None:
+            contribute(previous, -1)
+        contribute(record, 1)
+        current[record[0]] = record
+    
+    conn.executemany("INSERT OR REPLACE INTO entries_index VALUES (?, ?, ?, ?, ?, ?)",
+                     [current[date][:6] for date in dates])
+    conn.executemany("DELETE FROM entry_activities WHERE date = ?", [(date,) for date in superseded])
+    conn.executemany("INSERT INTO entry_activities VALUES (?, ?)",
+                     [(date, activity_id) for date in dates for activity_id in current[date][6]])
+    conn.executemany(
+        "INSERT INTO mood_stats VALUES (?, ?, ?, ?) ON CONFLICT (mood) DO UPDATE SET "
+        "entries = entries + excluded.entries, activity_entries = activity_entries + excluded.activity_entries, "
+        "activity_total = activity_total + excluded.activity_total",
+        [(mood, *delta) for mood, delta in mood_delta.items()])
+    conn.executemany(
+        "INSERT INTO sentiment_stats VALUES (?, ?) ON CONFLICT (sentiment) DO UPDATE SET "
+        "entries = entries + excluded.entries",
+        list(sentiment_delta.items()))
+    conn.executemany(
+        "INSERT INTO weekday_sentiment_stats VALUES (?, ?, ?) ON CONFLICT (weekday, sentiment) DO UPDATE SET "
+        "entries = entries + excluded.entries",
+        [(weekday, sentiment, delta) for (weekday, sentiment), delta in weekday_delta.items()])
+    conn.executemany(
+        "INSERT INTO activity_mood_stats VALUES (?, ?, ?) ON CONFLICT (activity_id, mood) DO UPDATE SET "
+        "entries = entries + excluded.entries",
+        [(activity_id, mood, delta) for (activity_id, mood), delta in activity_delta.items() if delta])
+    _update_streaks(conn, records)
+    return len(dates) - len(superseded)
+
+def _advance_streak(state, date, sentiment):
+    """
+    Extends the streak state by an entry newer than any seen so far.
+    
+    A run only continues onto the next calendar day, so a missing day
+    breaks it (same rule as compute_streaks). The state before the entry
+    is kept in the prev_* fields so that overwriting the latest entry can
+    be undone in constant time.
+    
+    Args:
+        state (dict): Streak state, updated in place
+        date (str): Date of the new entry
+        sentiment (str): Sentiment of the new entry
+    """
+    follows = (state['last_date'] is not None and
+               datetime.strptime(date, DATE_FORMAT) - datetime.strptime(state['last_date'], DATE_FORMAT)
+               == timedelta(days=1))
+    state['prev_run'] = state['current_run']
+    state['prev_longest'] = state['longest_run']
+    state['prev_last_negative'] = state['last_negative']
+    state['prev_last_date'] = state['last_date']
+    if sentiment == 'Positive':
+        state['current_run'] = state['current_run'] + 1 if follows else 1
+    else:
+        state['current_run'] = 0
+    state['longest_run'] = max(state['longest_run'], state['current_run'])
+    if sentiment == 'Negative':
+        state['last_negative'] = date
+    state['last_date'] = date
+
+def _update_streaks(conn, records):
+    """
+    Updates the persisted streak state for newly indexed rows.
+    
+    New latest entries and overwrites of the latest entry are applied in
+    O(1); an overwritten or backfilled older entry triggers a full rebuild
+    from the date index.
+    
+    Args:
+        conn (sqlite3.Connection): Open index connection, inside a transaction
+        records (list): Tuples built by _index_record, already indexed
+    """
+    row = conn.execute(f"SELECT {', '.join(STREAK_FIELDS)} FROM streak_state WHERE id = 0").fetchone()
+    state = dict(zip(STREAK_FIELDS, row)) if row else dict(EMPTY_STREAK_STATE)
+    
+    for record in records:
+        date, sentiment = record[0], record[3]
+        if state['last_date'] is None or date > state['last_date']:
+            _advance_streak(state, date, sentiment)
+        elif date == state['last_date']:
+            state['current_run'] = state['prev_run']
+            state['longest_run'] = state['prev_longest']
+            state['last_negative'] = state['prev_last_negative']
+            state['last_date'] = state['prev_last_date']
+            _advance_streak(state, date, sentiment)
+        else:
+            state = dict(EMPTY_STREAK_STATE)
+            for date, sentiment in conn.execute("SELECT date, sentiment FROM entries_index ORDER BY date"):
+                _advance_streak(state, date, sentiment)
+            break
+    
+    conn.execute(f"INSERT OR REPLACE INTO streak_state (id, {', '.join(STREAK_FIELDS)}) "
+                 f"VALUES (0, {', '.join('?' * len(STREAK_FIELDS))})",
+                 [state[field] for field in STREAK_FIELDS])
+
+def _entry_exists(date):
+    """
+    Checks whether an entry for a date exists using the date index.
+    
+    Args:
+        date (str): Date in YYYY-MM-DD format
+        
+    Returns:
+        bool: True if the date has an entry
+    """
+    with _index_connection() as conn:
+        return conn.execute("SELECT 1 FROM entries_index WHERE date = ?", (date,)).fetchone() is not None
+
+def _index_counts():
+    """
+    Returns row counts tracked by the date index.
+    
+    The counts are kept in the index meta table and updated on every write,
+    so this reads a few rows whatever the history length.
+    
+    Returns:
+        dict: 'entries' (distinct dates), 'superseded' (overwritten rows still
+        stored) and 'log_rows' (rows in the write log)
+    """
+    with _index_connection() as conn:
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+    return {
+        'entries': meta['entry_count'],
+        'superseded': meta['row_count'] - meta['entry_count'],
+        'log_rows': meta['log_rows'],
+    }
+
+def compact_storage():
+    """
+    Rewrites the stored data keeping only the latest row per date.
+    
+    For columnar backends this also folds the write log into the base file.
+    The compacted files and an index over them are built next to the live
+    ones; rows appended while compaction runs are carried over, so writers
+    are only blocked for the final copy-and-rename step and for indexing
+    the carried-over rows.
+    """
+    backend = get_storage_backend()
+    with _compaction_lock:
+        if not os.path.exists(backend.log_path):
+            return
+        with _storage_lock:
+            snapshot_size = os.path.getsize(backend.log_path)
+            merges = _vocabulary_merges[0]
+        df = backend.read(log_limit=snapshot_size)
+        compacted = _latest_entries(df)
+        if len(compacted) == len(df) and backend.log_path == backend.path:
+            return
+        staged = backend.stage(compacted)
+        staged_index = _index_path() + '.compact'
+        if os.path.exists(staged_index):
+            os.remove(staged_index)  # left over from an interrupted compaction
+        with closing(_open_index(staged_index)) as conn:
+            _sync_index(conn, staged)
+        with _storage_lock:
+            with open(backend.log_path, 'rb') as f:
+                f.seek(snapshot_size)
+                log_tail = f.read()
+            backend.commit(staged, log_tail)
+            invalidate_entries_cache()
+            # Renames keep the inodes the staged index recorded, so only the carried-over rows are indexed
+            if merges == _vocabulary_merges[0]:
+                os.replace(staged_index, _index_path())
+            else:
+                os.remove(staged_index)
+            _sync_date_index()
+
+def _maybe_compact():
+    """
+    Starts a background compaction once enough rows have been superseded,
+    or once a columnar backend's write log has grown large enough to fold.
+    """
+    global _compaction_thread
+    backend = get_storage_backend()
+    counts = _index_counts()
+    folds_log = backend.log_path != backend.path
+    if counts['superseded'] < COMPACTION_THRESHOLD and not (folds_log and counts['log_rows'] >= LOG_FOLD_THRESHOLD):
+        return
+    if _compaction_thread is not None and _compaction_thread.is_alive():
+        return
+    
+    def run():
+        try:
+            compact_storage()
+        except Exception as e:
+            print(f"Error compacting data file: {e}")
+    
+    _compaction_thread = threading.Thread(target=run, name='mood-compaction', daemon=True)
+    _compaction_thread.start()
+
+def _file_signature(path):
+    """
+    Identifies the current version of a file without reading it.
+    
+    Args:
+        path (str): File path
+        
+    Returns:
+        tuple: (inode, size, mtime in ns)
+    """
+    stat = os.stat(path)
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+def invalidate_entries_cache():
+    """
+    Drops the in-memory copy of the entries so the next read reparses the data.
+    """
+    with _storage_lock:
+        _entries_cache['signature'] = None
+        _entries_cache['frames'] = {}
+        _entries_cache['by_date'] = {}
+
+def get_all_entries(columns=None):
+    """
+    Retrieves all mood entries from the configured storage backend.
+    
+    Entries come back with the declared schema (see _apply_schema). Parsed
+    DataFrames are cached in memory and only reloaded when the stored
+    files change (inode, size or mtime) or after a write invalidates them.
+    Callers get a copy, so they may modify it freely.
+    
+    Args:
+        columns (list): Columns to load, or None for all. Columnar backends
+            only read the requested columns from disk.
+    
+    Returns:
+        pandas.DataFrame: DataFrame containing all mood entries
+    """
+    try:
+        with _storage_lock:
+            return _cached_entries(columns).copy()
+    except Exception as e:
+        print(f"Error reading data file: {e}")
+        return pd.DataFrame()
+
+def _cached_entries(columns=None):
+    """
+    Returns the in-memory entries behind get_all_entries, reloading them if
+    the stored files changed. Must be called with _storage_lock held, and the
+    result must not be modified.
+    """
+    backend = get_storage_backend()
+    key = tuple(columns) if columns else None
+    _ensure_log(backend)
+    signature = (_file_signature(backend.log_path), backend.base_signature())
+    if _entries_cache['signature'] != signature:
+        _entries_cache['signature'] = signature
+        _entries_cache['frames'] = {}
+        _entries_cache['by_date'] = {}
+    frames = _entries_cache['frames']
+    if key not in frames:
+        if None in frames:
+            frames[key] = frames[None][list(key)]
+        elif key is None:
+            frames[key] = _latest_entries(backend.read())
+        else:
+            read_columns = list(dict.fromkeys(('Date',) + key))
+            frames[key] = _latest_entries(backend.read(read_columns))[list(key)]
+    return frames[key]
+
+def _entries_by_date(columns=None):
+    """
+    Returns the cached entries sorted by date (Date always included), sorting
+    them once per data version. Must be called with _storage_lock held, and
+    the result must not be modified.
+    """
+    columns = list(dict.fromkeys(['Date'] + list(columns))) if columns else None
+    entries = _cached_entries(columns)
+    by_date = _entries_cache['by_date']
+    key = tuple(columns) if columns else None
+    if key not in by_date:
+        by_date[key] = entries.sort_values('Date', kind='stable').reset_index(drop=True)
+    return by_date[key]
+
+def _day(value):
+    """
+    Converts a date string (YYYY-MM-DD) or date-like value to a date.
+    """
+    if isinstance(value, str):
+        return datetime.strptime(value, DATE_FORMAT).date()
+    return pd.Timestamp(value).date()
+
+def window_bounds(start_date=None, end_date=None, last_days=None):
+    """
+    Resolves a date window to its first and last day.
+    
+    Args:
+        start_date (str): First day (YYYY-MM-DD or date-like), None for no lower bound
+        end_date (str): Last day (YYYY-MM-DD or date-like), None for no upper bound
+        last_days (int): Only the last N days up to end_date (or today);
+            takes precedence over start_date
+        
+    Returns:
+        tuple: (start, end) as YYYY-MM-DD strings, None for an open side
+        
+    Raises:
+        ValueError: If a date is malformed or last_days is below 1
+    """
+    end = _day(end_date) if end_date is not None else None
+    start = _day(start_date) if start_date is not None else None
+    if last_days is not None:
+        if int(last_days) < 1:
+            raise ValueError("last_days must be at least 1")
+        end = end or datetime.now().date()
+        start = end - timedelta(days=int(last_days) - 1)
+    return (start.strftime(DATE_FORMAT) if start else None, end.strftime(DATE_FORMAT) if end else None)
+
+def _date_range(start, end):
+    """
+    Parameters for a 'date BETWEEN ? AND ?' clause over an open or closed window.
+    """
+    return (start or '0000-00-00', end or '9999-12-31')
+
+def _resolve_window(start_date=None, end_date=None, last_days=None):
+    """
+    Resolves the window of an analysis view: the one given, else the session
+    window set with set_analysis_window.
+    """
+    if start_date is None and end_date is None and last_days is None:
+        return window_bounds(**_analysis_window)
+    return window_bounds(start_date, end_date, last_days)
+
+def _window_label(start, end):
+    """
+    Describes a resolved window for display.
+    """
+    if start is None and end is None:
+        return "all history"
+    return f"{start or 'first entry'} to {end or 'latest entry'}"
+
+def query_entries(start_date=None, end_date=None, last_days=None, columns=None):
+    """
+    Returns the entries in a date window, sorted by date.
+    
+    Entries are kept sorted by date in memory (re-sorted only when the data
+    changes) and the window edges are found by binary search, so a query
+    only copies the rows in range.
+    
+    Args:
+        start_date (str): First day, None for no lower bound
+        end_date (str): Last day, None for no upper bound
+        last_days (int): Only the last N days up to end_date (or today)
+        columns (list): Columns to return, or None for all
+        
+    Returns:
+        pandas.DataFrame: Entries in the window
+    """
+    start, end = window_bounds(start_date, end_date, last_days)
+    try:
+        with _storage_lock:
+            df = _entries_by_date(columns)
+            dates = df['Date'].to_numpy()
+            lo = np.searchsorted(dates, np.datetime64(start, 's'), side='left') if start else 0
+            hi = np.searchsorted(dates, np.datetime64(end, 's'), side='right') if end else len(dates)
+            window = df.iloc[lo:hi]
+            return (window[columns] if columns else window).reset_index(drop=True)
+    except Exception as e:
+        print(f"Error reading data file: {e}")
+        return pd.DataFrame()
+
+def get_rolling_distribution(column='Mood', window_days=30, start_date=None, end_date=None, last_days=None,
+                             normalize=False):
+    """
+    Returns the mood or sentiment distribution over a trailing window for every day.
+    
+    The row for day t counts the entries from t - window_days + 1 to t.
+    Counts come from cumulative sums over the date-sorted entries, with two
+    binary searches per day for the window edges, so the cost does not
+    depend on the window length.
+    
+    Args:
+        column (str): 'Mood' or 'Sentiment'
+        window_days (int): Length of the trailing window, e.g. one of ROLLING_WINDOWS
+        start_date (str): First day to report, None for the first entry
+        end_date (str): Last day to report, None for the latest entry
+        last_days (int): Only report the last N days up to end_date (or today)
+        normalize (bool): Return shares per day instead of counts
+        
+    Returns:
+        pandas.DataFrame: One row per calendar day, one column per category
+        
+    Raises:
+        ValueError: If window_days is below 1, or the date window is invalid
+    """
+    if int(window_days) < 1:
+        raise ValueError("window_days must be at least 1")
+    window_days = int(window_days)
+    start, end = window_bounds(start_date, end_date, last_days)
+    with _storage_lock:
+        df = _entries_by_date([column])
+    if df.empty:
+        return pd.DataFrame()
+    
+    dates = df['Date'].to_numpy().astype('datetime64[D]')
+    values = df[column]
+    categories = [category for category in values.cat.categories if (values == category).any()]
+    codes = pd.Categorical(values, categories=categories).codes
+    onehot = np.zeros((len(df), len(categories)), dtype=np.int64)
+    present = codes >= 0
+    onehot[np.flatnonzero(present), codes[present]] = 1
+    cumulative = np.vstack((np.zeros((1, len(categories)), dtype=np.int64), onehot.cumsum(axis=0)))
+    
+    first = np.datetime64(start, 'D') if start else dates[0]
+    last = np.datetime64(end, 'D') if end else dates[-1]
+    days = np.arange(first, last + np.timedelta64(1, 'D'), dtype='datetime64[D]')
+    hi = np.searchsorted(dates, days, side='right')
+    lo = np.searchsorted(dates, days - np.timedelta64(window_days - 1, 'D'), side='left')
+    counts = pd.DataFrame(cumulative[hi] - cumulative[lo], index=pd.DatetimeIndex(days, name='Date'),
+                          columns=pd.Index(categories, name=column))
+    if normalize:
+        return counts.div(counts.sum(axis=1).replace(0, np.nan), axis=0)
+    return counts
+
+def add_entry(mood, activities, notes):
+    """
+    Adds a new mood entry to the data file.
+    
+    The entry is appended to the end of the file, so saving costs the same
+    regardless of history length. Overwriting today's entry appends a
+    superseding row; old rows are dropped later by background compaction.
+    
+    Args:
+        mood (str): The mood to record
+        activities (str): Comma-separated activities
+        notes (str): Additional notes/comments
+    """
+    date = datetime.now().strftime('%Y-%m-%d')
+    mood = mood.title()
+    activities = ', '.join(parse_activities(activities))
+    notes = notes.strip()
+    
+    sentiment = analyze_sentiment(notes)
+    new_entry = {'Date': date, 'Mood': mood, 'Activities': activities, 'Notes': notes, 'Sentiment': sentiment}
+    new_entry_df = pd.DataFrame([new_entry])
+    
+    try:
+        superseding = _entry_exists(date)
+        if superseding:
+            overwrite = input("An entry for today already exists. Do you want to overwrite it? (y/n): ").strip().lower()
+            if overwrite != 'y':
+                print("Entry not saved.")
+                return
+            
+        _append_entries(new_entry_df)
+        print("Entry saved successfully.")
+        
+        _maybe_compact()
+        
+        # Tips first, so they are printed before a background fetch can finish
+        provide_mood_tips(sentiment)
+        if SUGGESTION_STREAMING:
+            provide_suggestions_streaming(mood, activities)
+        else:
+            provide_suggestions_async(mood, activities)
+        
+    except Exception as e:
+        print(f"Error adding new entry: {e}")
+        
+        
+def _data_version():
+    """
+    Identifies the current version of the stored entries without reading them.
+    
+    Returns:
+        list: File signatures of the write log and the base file
+    """
+    backend = get_storage_backend()
+    with _storage_lock:
+        _ensure_log(backend)
+        return [_file_signature(backend.log_path), backend.base_signature()]
+
+def _chart_cache_path(name, figsize, fmt, params):
+    """
+    Path of the cached rendering of a chart for the current data version.
+    """
+    key = json.dumps([os.path.abspath(DATA_FILE), _data_version(), name, list(figsize), fmt, params],
+                     sort_keys=True, default=str)
+    return os.path.join(CHART_CACHE_DIR, f"{name}-{hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]}.{fmt}")
+
+def invalidate_chart_cache():
+    """
+    Deletes all cached chart renderings.
+    """
+    if os.path.isdir(CHART_CACHE_DIR):
+        for file_name in os.listdir(CHART_CACHE_DIR):
+            try:
+                os.remove(os.path.join(CHART_CACHE_DIR, file_name))
+            except OSError:
+                pass
+
+def _apply_plot_style():
+    """
+    Sets the seaborn plotting style, once per session.
+    
+    Axes take their style when they are created, so this has to run before
+    a chart's figure and axes are made, not from inside draw.
+    """
+    if not _plot_style_applied[0]:
+        sns.set(style="whitegrid")
+        _plot_style_applied[0] = True
+
+def _render_file(name, draw, figsize, path, fmt):
+    """
+    Renders a chart headlessly (Agg) to a file on a reused off-screen figure.
+    
+    The file is written under a temporary name and moved into place, so
+    readers never see a partial chart.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    _apply_plot_style()
+    with _render_lock:
+        fig = _figures.get(name)
+        if fig is None:
+            fig = _figures[name] = mpl_figure.Figure()
+            backend_agg.FigureCanvasAgg(fig)
+        fig.clear()
+        fig.set_size_inches(figsize)
+        try:
+            draw(fig.add_subplot())
+            fig.tight_layout()
+            fig.savefig(tmp_path, format=fmt)
+        finally:
+            fig.clear()  # Drop the artists until the next render
+    os.replace(tmp_path, path)
+
+def _show_image(path, figsize):
+    """
+    Shows a rendered chart image in a window.
+    """
+    fig = plt.figure(figsize=figsize)
+    try:
+        ax = fig.add_axes([0, 0, 1, 1])
+        ax.imshow(plt.imread(path))
+        ax.axis('off')
+        plt.show()
+    finally:
+        plt.close(fig)
+
+def render_chart(name, draw, figsize, output_dir=None, fmt=None, params=None, use_cache=True):
+    """
+    Draws a chart and either shows it in a window or writes it to a file.
+    
+    Renders are cached in CHART_CACHE_DIR, keyed by the data version, the
+    chart and its parameters, so showing an unchanged chart again skips
+    drawing it. Headless renders use the Agg canvas on figures kept in
+    _figures and cleared after every render, so rendering many charts
+    neither needs a display nor accumulates figures. Shown figures are
+    always closed.
+    
+    Args:
+        name (str): Chart name, also the file name without extension
+        draw (callable): Called with the matplotlib Axes to draw on
+        figsize (tuple): Figure size in inches
+        output_dir (str): Directory to write to, None to show the chart
+        fmt (str): File format, 'png' or 'svg' (defaults to PLOT_FORMAT)
+        params (dict): Anything besides the data that changes the chart
+        use_cache (bool): Read and update the chart cache
+        
+    Returns:
+        str or None: Path of the written file
+    """
+    fmt = (fmt or PLOT_FORMAT) if output_dir is not None else 'png'
+    
+    if not use_cache:
+        if output_dir is None:
+            _apply_plot_style()
+            fig, ax = plt.subplots(figsize=figsize)
+            try:
+                draw(ax)
+                fig.tight_layout()
+                plt.show()
+            finally:
+                plt.close(fig)
+            return None
+        path = os.path.join(output_dir, f"{name}.{fmt}")
+        _render_file(name, draw, figsize, path, fmt)
+        return path
+    
+    cached_path = _chart_cache_path(name, figsize, fmt, params)
+    if not os.path.exists(cached_path):
+        _render_file(name, draw, figsize, cached_path, fmt)
+    if output_dir is None:
+        _show_image(cached_path, figsize)
+        return None
+    
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{name}.{fmt}")
+    shutil.copyfile(cached_path, path)
+    return path
+
+def _draw_mood_distribution(ax, df):
+    """
+    Draws the bar plot of how often each mood was logged.
+    """
+    mood_counts = df['Mood'].value_counts()
+    mood_counts = mood_counts[mood_counts > 0]
+    mood_counts.index = mood_counts.index.astype(str)
+    sns.barplot(y=mood_counts.index, x=mood_counts.values, palette='viridis', hue=mood_counts.index, legend=False, ax=ax)
+    ax.set_title('Overall Mood Distribution')
+    ax.set_xlabel('Count')
+    ax.set_ylabel('Mood')
+
+def view_mood_trends(output_dir=None, fmt=None, start_date=None, end_date=None, last_days=None):
+    """
+    Analyzes and plots mood trends using improved visualizations.
+    Shows mood distribution.
+    
+    Args:
+        output_dir (str): Write the chart to this directory instead of
+            showing it (defaults to PLOT_OUTPUT_DIR)
+        fmt (str): File format, 'png' or 'svg' (defaults to PLOT_FORMAT)
+        start_date, end_date, last_days: Date window (see window_bounds),
+            defaults to the session window
+        
+    Returns:
+        str or None: Path of the written chart
+    """
+    print("\n--- Mood Trends ---")
+    start, end = _resolve_window(start_date, end_date, last_days)
+    if start or end:
+        print(f"Window: {_window_label(start, end)}")
+    df = query_entries(start, end, columns=['Mood'])
+    if df.empty:
+        print("No data available to analyze.")
+        return None
+        
+    try:
+        path = render_chart('mood_trends', lambda ax: _draw_mood_distribution(ax, df), (12, 6),
+                            output_dir or PLOT_OUTPUT_DIR, fmt, params={'window': [start, end]})
+        if path:
+            print(f"Chart saved to {path}")
+        return path
+        
+    except Exception as e:
+        print(f"Error generating mood trends visualization: {e}")
+        return None
+
+def activity_mood_counts(df):
+    """
+    Counts how often each activity was logged together with each mood.
+    
+    Args:
+        df (pandas.DataFrame): Entries with Mood and Activities columns
+        
+    Returns:
+        pandas.DataFrame: Counts with activities as rows and moods as columns
+    """
+    activity_mood = df[['Mood', 'Activities']].copy()
+    activity_mood['Activities'] = activity_mood['Activities'].str.split(',')
+    activity_mood = activity_mood.explode('Activities')
+    activity_mood['Activities'] = activity_mood['Activities'].str.strip().str.lower()
+    
+    return pd.pivot_table(activity_mood, index='Activities', columns='Mood', aggfunc='size', fill_value=0, observed=True)
+
+class CooccurrenceMatrix:
+    """
+    Sparse activity x mood co-occurrence counts in CSR layout.
+    
+    Row i counts activity activities[i]: the moods it was logged with are
+    moods[indices[indptr[i]:indptr[i + 1]]], with the number of entries in
+    data[indptr[i]:indptr[i + 1]].
+    
+    Attributes:
+        activities (list): Activity names, one per row
+        moods (list): Mood names, one per column
+        indptr (numpy.ndarray): Start of each row in indices and data
+        indices (numpy.ndarray): Mood column of each stored count
+        data (numpy.ndarray): Stored (nonzero) counts
+    """
+    def __init__(self, activities, moods, indptr, indices, data):
+        self.activities = activities
+        self.moods = moods
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+    
+    @classmethod
+    def from_frame(cls, frame):
+        """
+        Builds the sparse matrix from a dense table of counts.
+        
+        Args:
+            frame (pandas.DataFrame): Counts with activities as rows and moods as columns
+            
+        Returns:
+            CooccurrenceMatrix: The nonzero counts of frame
+        """
+        dense = frame.to_numpy(dtype=np.int64)
+        rows, cols = np.nonzero(dense)
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=dense.shape[0]))))
+        return cls([str(name) for name in frame.index], [str(name) for name in frame.columns],
+                   indptr, cols, dense[rows, cols])
+    
+    @property
+    def shape(self):
+        return (len(self.activities), len(self.moods))
+    
+    def row(self, activity):
+        """
+        Returns the mood counts of one activity.
+        
+        Args:
+            activity (str): Activity name
+            
+        Returns:
+            dict: Count by mood, only moods with a nonzero count
+        """
+        try:
+            i = self.activities.index(activity)
+        except ValueError:
+            return {}
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return {self.moods[j]: int(count) for j, count in zip(self.indices[start:end], self.data[start:end])}
+    
+    def toarray(self):
+        """
+        Returns the counts as a dense activities x moods array.
+        """
+        dense = np.zeros(self.shape, dtype=np.int64)
+        rows = np.repeat(np.arange(len(self.activities)), np.diff(self.indptr))
+        dense[rows, self.indices] = self.data
+        return dense
+    
+    def to_frame(self):
+        """
+        Returns the counts as a DataFrame with activities as rows and moods as columns.
+        """
+        return pd.DataFrame(self.toarray(), index=pd.Index(self.activities, name='Activities'),
+                            columns=pd.Index(self.moods, name='Mood'))
+
+def get_activity_mood_matrix(start_date=None, end_date=None, last_days=None):
+    """
+    Returns the activity-mood co-occurrence counts, for all entries or a date window.
+    
+    For all entries the counts kept in the index are read; they are updated
+    incrementally on every write (an overwritten entry is subtracted first),
+    so this reads one row per nonzero activity-mood pair instead of scanning
+    the entries. A window counts the (date, activity ID) rows of the entries
+    in range, found through the index on date. Each activity is counted once
+    per entry, under its canonical name from the activity vocabulary.
+    
+    Args:
+        start_date, end_date, last_days: Date window, see window_bounds
+    
+    Returns:
+        CooccurrenceMatrix: Activities sorted by name, moods in MOOD_CATEGORIES order
+    """
+    start, end = window_bounds(start_date, end_date, last_days)
+    with _index_connection() as conn:
+        if start is None and end is None:
+            rows = conn.execute("SELECT a.name, s.mood, s.entries FROM activity_mood_stats s "
+                                "JOIN vocab.activities a ON a.id = s.activity_id WHERE s.entries > 0").fetchall()
+        else:
+            rows = conn.execute("SELECT a.name, e.mood, COUNT(*) FROM entries_index e "
+                                "JOIN entry_activities x ON x.date = e.date "
+                                "JOIN vocab.activities a ON a.id = x.activity_id "
+                                "WHERE e.date BETWEEN ? AND ? AND e.mood IS NOT NULL "
+                                "GROUP BY a.name, e.mood", _date_range(start, end)).fetchall()
+    activities = sorted({name for name, _, _ in rows})
+    moods = _category_order({mood for _, mood, _ in rows}, MOOD_CATEGORIES)
+    activity_pos = {name: i for i, name in enumerate(activities)}
+    mood_pos = {mood: j for j, mood in enumerate(moods)}
+    
+    row_ids = np.fromiter((activity_pos[name] for name, _, _ in rows), dtype=np.int64, count=len(rows))
+    col_ids = np.fromiter((mood_pos[mood] for _, mood, _ in rows), dtype=np.int64, count=len(rows))
+    counts = np.fromiter((entries for _, _, entries in rows), dtype=np.int64, count=len(rows))
+    order = np.lexsort((col_ids, row_ids))
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(row_ids, minlength=len(activities)))))
+    return CooccurrenceMatrix(activities, moods, indptr, col_ids[order], counts[order])
+
+def _erfc(x):
+    """
+    Complementary error function for arrays, with a fractional error below 1.2e-7.
+    
+    Uses the Chebyshev fit from Numerical Recipes, so p-values need no SciPy.
+    """
+    z = np.abs(x)
+    t = 1 / (1 + 0.5 * z)
+    r = t * np.exp(-z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (
+        -0.82215223 + t * 0.17087277)))))))))
+    return np.where(x >= 0, r, 2 - r)
+
+def activity_associations(matrix, mood_totals, total):
     """
-    Analyzes the sentiment of provided text using TextBlob.
+    Computes association metrics for every activity-mood pair.
+    
+    Each pair is treated as a 2x2 table over all entries (activity logged or
+    not, mood or not), all pairs at once with NumPy:
+    - Lift: observed / expected co-occurrences, 1 when independent
+    - PMI: log2 of the lift, -inf for pairs never seen together
+    - Phi: correlation of the two yes/no indicators, from -1 to 1
+    - Chi2, P-value: chi-square test of independence (1 degree of freedom)
     
     Args:
-        notes (str): Text to analyze
+        matrix (CooccurrenceMatrix): Activity-mood co-occurrence counts
+        mood_totals (dict): Number of entries per mood
+        total (int): Number of entries
         
     Returns:
-        str: Sentiment category ('Positive', 'Negative', or 'Neutral')
+        pandas.DataFrame: Activity, Mood, Count, Expected, Lift, PMI, Phi, Chi2
+        and P-value, one row per pair
     """
-    blob = TextBlob(notes)
-    polarity = blob.sentiment.polarity
+    counts = matrix.toarray().astype(float)
+    n_activity = counts.sum(axis=1, keepdims=True)  # Each activity counts once per entry
+    n_mood = np.array([mood_totals.get(mood, 0) for mood in matrix.moods], dtype=float)[np.newaxis, :]
     
-    if polarity > 0.1:
-        return 'Positive'
-    elif polarity < -0.1:
-        return 'Negative'
-    else:
-        return 'Neutral'
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected = n_activity * n_mood / total
+        lift = counts / expected
+        pmi = np.log2(lift)
+        phi = ((counts * total - n_activity * n_mood) /
+               np.sqrt(n_activity * (total - n_activity) * n_mood * (total - n_mood)))
+    phi = np.nan_to_num(phi, nan=0.0)  # An activity or mood present in every entry tells nothing
+    chi2 = total * phi ** 2
+    p_value = _erfc(np.sqrt(chi2 / 2))
+    
+    num_activities, num_moods = counts.shape
+    return pd.DataFrame({
+        'Activity': np.repeat(np.array(matrix.activities, dtype=object), num_moods),
+        'Mood': np.tile(np.array(matrix.moods, dtype=object), num_activities),
+        'Count': counts.ravel().astype(np.int64),
+        'Expected': expected.ravel(),
+        'Lift': lift.ravel(),
+        'PMI': pmi.ravel(),
+        'Phi': phi.ravel(),
+        'Chi2': chi2.ravel(),
+        'P-value': p_value.ravel(),
+    })
 
-def provide_mood_tips(sentiment):
+def get_activity_associations(start_date=None, end_date=None, last_days=None):
     """
-    Provides mood improvement tips based on the sentiment.
+    Returns association metrics of all activity-mood pairs in the stored history.
     
     Args:
-        sentiment (str): The sentiment category
+        start_date, end_date, last_days: Date window, see window_bounds
+    
+    Returns:
+        pandas.DataFrame: See activity_associations
     """
-    tips = {
-        'Positive': "Keep up the great work! Consider maintaining your routine to sustain your positive mood.",
-        'Neutral': "It's a balanced day. To enhance your mood, try engaging in activities you enjoy.",
-        'Negative': "I'm sorry you're feeling this way. Consider reaching out to a friend or trying a relaxation technique."
-    }
-    print("\n**Mood Improvement Tips:**")
-    print(tips.get(sentiment, "Stay positive!"))
+    start, end = window_bounds(start_date, end_date, last_days)
+    matrix = get_activity_mood_matrix(start, end)
+    stats = get_mood_stats(start, end)
+    return activity_associations(matrix, stats['mood_counts'], stats['entries'])
 
-def provide_suggestions(mood, activities):
+def top_associations(associations, k=10, min_count=ASSOCIATION_MIN_COUNT):
     """
-    Uses OpenAI API to provide personalized suggestions based on mood and activities.
+    Returns the strongest activity-mood associations, positive or negative.
     
     Args:
-        mood (str): Current mood
-        activities (str): Activities performed
-    """
-    prompt = f"""
-    I am feeling {mood} today. I have done the following activities: {activities}. 
-    Can you provide some suggestions or activities to help me maintain or improve my mood?
-    """
-    
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=150,
-            temperature=0.7,
-        )
-        suggestion = response.choices[0].message.content.strip()
-        print("\n**Suggestions to Improve or Maintain Your Mood:**")
-        print(suggestion)
+        associations (pandas.DataFrame): Output of activity_associations
+        k (int): Number of pairs to return
+        min_count (int): Fewest co-occurrences a pair needs to be ranked
         
-    except Exception as e:
-        print(f"Error fetching suggestions: {e}")
+    Returns:
+        pandas.DataFrame: Up to k rows, by decreasing absolute phi
+    """
+    supported = associations[associations['Count'] >= min_count]
+    order = np.argsort(-np.abs(supported['Phi'].to_numpy()), kind='stable')[:k]
+    return supported.iloc[order].reset_index(drop=True)
 
-def get_all_entries():
+@contextmanager
+def _scratch_data_file():
     """
-    Retrieves all mood entries from the CSV file.
+    Points DATA_FILE at an empty file in a temporary directory, so benchmarks
+    and checks never touch the user's data.
     
-    Returns:
-        pandas.DataFrame: DataFrame containing all mood entries
+    Yields:
+        str: The temporary DATA_FILE
     """
-    try:
-        if not os.path.exists(DATA_FILE):
-            os.makedirs('data', exist_ok=True)
-            df = pd.DataFrame(columns=['Date', 'Mood', 'Activities', 'Notes', 'Sentiment'])
-            df.to_csv(DATA_FILE, index=False)
-        return pd.read_csv(DATA_FILE)
-    except Exception as e:
-        print(f"Error reading data file: {e}")
-        return pd.DataFrame()
+    global DATA_FILE
+    saved = DATA_FILE
+    with tempfile.TemporaryDirectory() as directory:
+        DATA_FILE = os.path.join(directory, 'mood_data' + os.path.splitext(saved)[1])
+        invalidate_entries_cache()
+        try:
+            yield DATA_FILE
+        finally:
+            DATA_FILE = saved
+            invalidate_entries_cache()
 
-def add_entry(mood, activities, notes):
+def benchmark_associations(num_entries=20000, num_activities=2000, repeats=3):
     """
-    Adds a new mood entry to the CSV file.
+    Prints how long association metrics take via explode/pivot_table and via
+    the incrementally maintained co-occurrence matrix.
+    
+    Both paths start from stored entries in a scratch data file: the pivot
+    approach rebuilds the counts from all rows on every call, while
+    get_activity_associations (what the views use) reads the matrix and
+    mood totals kept up to date in the index at write time.
     
     Args:
-        mood (str): The mood to record
-        activities (str): Comma-separated activities
-        notes (str): Additional notes/comments
+        num_entries (int): Number of synthetic entries
+        num_activities (int): Number of distinct activities
+        repeats (int): Runs per approach, the fastest is reported
     """
-    date = datetime.now().strftime('%Y-%m-%d')
-    mood = mood.title()
-    activities = ', '.join([activity.strip().lower() for activity in activities.split(',')])
-    notes = notes.strip()
+    rng = np.random.default_rng(0)
+    names = np.array([f'activity {i}' for i in range(num_activities)])
+    df = pd.DataFrame({
+        'Date': pd.date_range('1950-01-01', periods=num_entries, freq='D'),
+        'Mood': rng.choice([mood.title() for mood in COMMON_MOODS], num_entries),
+        'Activities': [', '.join(rng.choice(names, rng.integers(1, 5), replace=False)) for _ in range(num_entries)],
+        'Notes': '',
+        'Sentiment': 'Neutral',
+    })
     
-    sentiment = analyze_sentiment(notes)
-    new_entry = {'Date': date, 'Mood': mood, 'Activities': activities, 'Notes': notes, 'Sentiment': sentiment}
-    new_entry_df = pd.DataFrame([new_entry])
+    def best_time(func):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - start)
+        return min(times), result
     
-    try:
-        if os.path.exists(DATA_FILE):
-            df = pd.read_csv(DATA_FILE)
-            if date in df['Date'].values:
-                overwrite = input("An entry for today already exists. Do you want to overwrite it? (y/n): ").strip().lower()
-                if overwrite != 'y':
-                    print("Entry not saved.")
-                    return
-                df = df[df['Date'] != date]
-            df = pd.concat([df, new_entry_df], ignore_index=True)
-        else:
-            os.makedirs('data', exist_ok=True)
-            df = new_entry_df
-            
-        df.to_csv(DATA_FILE, index=False)
-        print("Entry saved successfully.")
-        
-        provide_suggestions(mood, activities)
-        provide_mood_tips(sentiment)
-        
-    except Exception as e:
-        print(f"Error adding new entry: {e}")
-        
-        
-def view_mood_trends():
+    def pivot():
+        entries = get_all_entries(['Mood', 'Activities'])
+        mood_totals = entries['Mood'].value_counts().to_dict()
+        return activity_associations(CooccurrenceMatrix.from_frame(activity_mood_counts(entries)),
+                                     mood_totals, len(entries))
+    
+    with _scratch_data_file():
+        _append_entries(df)
+        pivot_time, expected = best_time(pivot)
+        engine_time, result = best_time(get_activity_associations)
+    
+    key = ['Activity', 'Mood']
+    expected = expected[expected['Count'] > 0].sort_values(key).reset_index(drop=True)
+    result = result[result['Count'] > 0].sort_values(key).reset_index(drop=True)
+    print(f"\n=== Activity Associations ({num_entries} entries, {num_activities} activities) ===")
+    print(f"explode + pivot_table:      {pivot_time * 1000:8.1f} ms")
+    print(f"index co-occurrence matrix: {engine_time * 1000:8.1f} ms ({pivot_time / engine_time:.0f}x)")
+    print(f"Results match: {expected[key].equals(result[key]) and np.allclose(expected['Phi'], result['Phi'])}")
+
+def _draw_activity_heatmap(ax, phi):
     """
-    Analyzes and plots mood trends using improved visualizations.
-    Shows mood distribution.
+    Draws the heatmap of activity-mood phi coefficients.
     """
-    print("\n--- Mood Trends ---")
-    df = get_all_entries()
-    if df.empty:
-        print("No data available to analyze.")
-        return
-        
-    try:
-        # Create figure for mood distribution
-        plt.figure(figsize=(12, 6))
-        
-        # Plot mood distribution
-        mood_counts = df['Mood'].value_counts()
-        sns.barplot(y=mood_counts.index, x=mood_counts.values, palette='viridis', hue=mood_counts.index, legend=False)
-        plt.title('Overall Mood Distribution')
-        plt.xlabel('Count')
-        plt.ylabel('Mood')
-        
-        plt.tight_layout()
-        plt.show()
-        plt.close()  # Close the plot window
-        
-    except Exception as e:
-        print(f"Error generating mood trends visualization: {e}")
-        plt.close()  # Ensure plot window is closed even if error occurs
-        
-    except Exception as e:
-        print(f"Error generating mood trends visualization: {e}")
+    sns.heatmap(phi, annot=True, fmt='.2f', cmap='coolwarm', center=0, vmin=-1, vmax=1, ax=ax)
+    ax.set_title('Correlation Between Activities and Moods (phi)')
+    ax.set_xlabel('Mood')
+    ax.set_ylabel('Activities')
 
-def view_activity_correlation():
+def view_activity_correlation(output_dir=None, fmt=None, start_date=None, end_date=None, last_days=None):
     """
     Analyzes and plots correlation between activities and moods using a heatmap.
+    
+    Args:
+        output_dir (str): Write the chart to this directory instead of
+            showing it (defaults to PLOT_OUTPUT_DIR)
+        fmt (str): File format, 'png' or 'svg' (defaults to PLOT_FORMAT)
+        start_date, end_date, last_days: Date window (see window_bounds),
+            defaults to the session window
+        
+    Returns:
+        str or None: Path of the written chart
     """
     print("\n--- Activity Correlations ---")
-    df = get_all_entries()
-    if df.empty:
+    try:
+        start, end = _resolve_window(start_date, end_date, last_days)
+        if start or end:
+            print(f"Window: {_window_label(start, end)}")
+        matrix = get_activity_mood_matrix(start, end)
+    except Exception as e:
+        print(f"Error generating activity correlation: {e}")
+        return None
+    if matrix.shape[0] == 0:
         print("No data available to analyze.")
-        return
+        return None
         
     try:
-        activity_mood = df[['Mood', 'Activities']].copy()
-        activity_mood['Activities'] = activity_mood['Activities'].str.split(',')
-        activity_mood = activity_mood.explode('Activities')
-        activity_mood['Activities'] = activity_mood['Activities'].str.strip().str.lower()
-        
-        pivot = pd.pivot_table(activity_mood, index='Activities', columns='Mood', aggfunc='size', fill_value=0)
-        print("Activity-Mood Correlation Matrix:")
-        print(pivot)
-        
-        plt.figure(figsize=(12, 10))
-        sns.heatmap(pivot, annot=True, fmt='d', cmap='coolwarm')
-        plt.title('Correlation Between Activities and Moods')
-        plt.xlabel('Mood')
-        plt.ylabel('Activities')
-        plt.tight_layout()
-        plt.show()
+        stats = get_mood_stats(start, end)
+        associations = activity_associations(matrix, stats['mood_counts'], stats['entries'])
+        phi = associations.pivot(index='Activity', columns='Mood', values='Phi').reindex(
+            index=matrix.activities, columns=matrix.moods)
+        print("Activity-Mood Correlation Matrix (phi coefficient):")
+        print(phi.round(2))
+        
+        top = top_associations(associations)
+        if not top.empty:
+            print("\nStrongest associations:")
+            print(top[['Activity', 'Mood', 'Count', 'Lift', 'PMI', 'Phi', 'P-value']].to_string(
+                index=False, float_format=lambda value: f"{value:.3g}"))
+        
+        path = render_chart('activity_correlation', lambda ax: _draw_activity_heatmap(ax, phi), (12, 10),
+                            output_dir or PLOT_OUTPUT_DIR, fmt, params={'metric': 'phi', 'window': [start, end]})
+        if path:
+            print(f"Chart saved to {path}")
+        return path
         
     except Exception as e:
         print(f"Error generating activity correlation: {e}")
+        return None
 
-def show_mood_stats():
+def _category_order(values, categories):
+    """
+    Sorts values by their position in a category list, unknown values last.
+    """
+    return sorted(values, key=lambda value: (categories.index(value) if value in categories else len(categories), value))
+
+def get_mood_stats(start_date=None, end_date=None, last_days=None):
+    """
+    Returns mood statistics, for all entries or a date window.
+    
+    For all entries this reads the incrementally maintained aggregates,
+    which are updated on every write, so only a few small tables are read
+    regardless of history length. A window computes the same figures from
+    the index rows in range, found through the index on date.
+    
+    Args:
+        start_date, end_date, last_days: Date window, see window_bounds
+    
+    Returns:
+        dict: 'entries' (int), 'mood_counts' and 'mood_activity_avg' (by mood),
+        'sentiment_counts' (by sentiment) and 'weekday_sentiment_counts'
+        (by (day name, sentiment)); moods and sentiments in category order
+    """
+    start, end = window_bounds(start_date, end_date, last_days)
+    with _index_connection() as conn:
+        if start is None and end is None:
+            entries = conn.execute("SELECT value FROM meta WHERE key = 'entry_count'").fetchone()[0]
+            mood_rows = conn.execute(
+                "SELECT mood, entries, activity_entries, activity_total FROM mood_stats WHERE entries > 0").fetchall()
+            sentiment_rows = conn.execute("SELECT sentiment, entries FROM sentiment_stats WHERE entries > 0").fetchall()
+            weekday_rows = conn.execute(
+                "SELECT weekday, sentiment, entries FROM weekday_sentiment_stats WHERE entries > 0").fetchall()
+        else:
+            bounds = _date_range(start, end)
+            entries = conn.execute("SELECT COUNT(*) FROM entries_index WHERE date BETWEEN ? AND ?", bounds).fetchone()[0]
+            mood_rows = conn.execute(
+                "SELECT mood, COUNT(*), COUNT(activity_count), COALESCE(SUM(activity_count), 0) FROM entries_index "
+                "WHERE date BETWEEN ? AND ? AND mood IS NOT NULL GROUP BY mood", bounds).fetchall()
+            sentiment_rows = conn.execute(
+                "SELECT sentiment, COUNT(*) FROM entries_index "
+                "WHERE date BETWEEN ? AND ? AND sentiment IS NOT NULL GROUP BY sentiment", bounds).fetchall()
+            weekday_rows = conn.execute(
+                "SELECT weekday, sentiment, COUNT(*) FROM entries_index "
+                "WHERE date BETWEEN ? AND ? AND sentiment IS NOT NULL GROUP BY weekday, sentiment", bounds).fetchall()
+    
+    moods = {mood: (count, activity_entries, activity_total) for mood, count, activity_entries, activity_total in mood_rows}
+    mood_order = _category_order(moods, MOOD_CATEGORIES)
+    sentiments = dict(sentiment_rows)
+    return {
+        'entries': entries,
+        'mood_counts': {mood: moods[mood][0] for mood in mood_order},
+        'mood_activity_avg': {mood: moods[mood][2] / moods[mood][1] for mood in mood_order if moods[mood][1]},
+        'sentiment_counts': {sentiment: sentiments[sentiment]
+                             for sentiment in _category_order(sentiments, SENTIMENT_CATEGORIES)},
+        'weekday_sentiment_counts': {(calendar.day_name[weekday], sentiment): count
+                                     for weekday, sentiment, count in weekday_rows},
+    }
+
+def get_recent_sentiment(end_date=None, windows=ROLLING_WINDOWS):
+    """
+    Returns the sentiment shares over trailing windows ending on one day.
+    
+    Each window is counted from the index rows in range, found through the
+    index on date, so the entries themselves are not loaded.
+    
+    Args:
+        end_date (str): Last day of the windows, None for today
+        windows (tuple): Window lengths in days
+        
+    Returns:
+        dict: Shares by sentiment (every sentiment in the data, in category
+        order) for each window length; windows without entries are left out
+    """
+    recent = {}
+    with _index_connection() as conn:
+        sentiments = [sentiment for (sentiment,) in
+                      conn.execute("SELECT sentiment FROM sentiment_stats WHERE entries > 0")]
+        sentiments = _category_order(sentiments, SENTIMENT_CATEGORIES)
+        for days in windows:
+            bounds = _date_range(*window_bounds(end_date=end_date, last_days=days))
+            counts = dict(conn.execute("SELECT sentiment, COUNT(*) FROM entries_index "
+                                       "WHERE date BETWEEN ? AND ? AND sentiment IS NOT NULL GROUP BY sentiment",
+                                       bounds).fetchall())
+            total = sum(counts.values())
+            if total:
+                recent[days] = {sentiment: counts.get(sentiment, 0) / total for sentiment in sentiments}
+    return recent
+
+def show_mood_stats(start_date=None, end_date=None, last_days=None):
     """
     Shows interesting statistics about mood patterns including most common moods,
     productive moods, and best days of the week.
+    
+    Args:
+        start_date, end_date, last_days: Date window (see window_bounds),
+            defaults to the session window
     """
-    df = get_all_entries()
-    if df.empty:
+    try:
+        start, end = _resolve_window(start_date, end_date, last_days)
+        stats = get_mood_stats(start, end)
+    except Exception as e:
+        print(f"Error calculating mood statistics: {e}")
+        return
+    if stats['entries'] == 0:
         print("No data available for analysis.")
         return
     
     try:
         print("\n=== Mood Statistics ===")
+        if start or end:
+            print(f"Window: {_window_label(start, end)}")
         
-        # Most common mood
-        most_common = df['Mood'].mode()[0]
-        mood_counts = df['Mood'].value_counts()
+        # Most common mood (ties go to the earlier mood in COMMON_MOODS)
+        mood_counts = stats['mood_counts']
+        most_common = max(mood_counts, key=mood_counts.get)
         print(f"Most frequent mood: {most_common} ({mood_counts[most_common]} times)")
         
-        # Most productive mood (most activities)
-        df['activity_count'] = df['Activities'].str.count(',') + 1
-        mood_productivity = df.groupby('Mood')['activity_count'].mean().sort_values(ascending=False)
-        productive_mood = mood_productivity.index[0]
-        productive_avg = mood_productivity.iloc[0]  # Using iloc instead of [0]
-        print(f"Most productive mood: {productive_mood} (avg {productive_avg:.1f} activities)")
+        # Most productive mood (most distinct activities per entry, counted at write time)
+        mood_productivity = stats['mood_activity_avg']
+        if mood_productivity:
+            productive_mood = max(mood_productivity, key=mood_productivity.get)
+            productive_avg = mood_productivity[productive_mood]
+            print(f"Most productive mood: {productive_mood} (avg {productive_avg:.1f} activities)")
         
-        # Convert date and calculate day statistics
-        df['Date'] = pd.to_datetime(df['Date'])
-        df['DayOfWeek'] = df['Date'].dt.day_name()
-        best_day = df[df['Sentiment'] == 'Positive']['DayOfWeek'].mode()[0]
-        print(f"Best day of the week: {best_day}")
+        # Day of the week with the most positive entries
+        positive_days = {day: count for (day, sentiment), count in stats['weekday_sentiment_counts'].items()
+                         if sentiment == 'Positive'}
+        if positive_days:
+            best_day = max(sorted(positive_days), key=positive_days.get)
+            print(f"Best day of the week: {best_day}")
         
         # Sentiment distribution
-        sentiment_dist = df['Sentiment'].value_counts()
+        sentiment_dist = stats['sentiment_counts']
         print("\nSentiment Distribution:")
-        for sentiment, count in sentiment_dist.items():
-            print(f"{sentiment}: {count} entries")
+        for sentiment in sorted(sentiment_dist, key=sentiment_dist.get, reverse=True):
+            print(f"{sentiment}: {sentiment_dist[sentiment]} entries")
+        
+        # Sentiment shares over the rolling windows ending at the window end (or today)
+        recent = [f"Last {days} days: " + ', '.join(f"{sentiment} {share:.0%}" for sentiment, share in shares.items())
+                  for days, shares in get_recent_sentiment(end).items()]
+        if recent:
+            print("\nRecent Sentiment:")
+            print('\n'.join(recent))
             
     except Exception as e:
         print(f"Error calculating mood statistics: {e}")
 
-def track_mood_streaks():
+def compute_streaks(dates, mask, as_of=None):
     """
-    Tracks and displays positive mood streaks and other streak-based statistics.
+    Computes runs of consecutive calendar days on which a predicate holds.
+    
+    Fully vectorized: matching days are sorted and split wherever the gap
+    to the previous matching day is not exactly one day, so a missing day
+    or a non-matching entry both break a run.
+    
+    Args:
+        dates (array-like): Unique entry dates
+        mask (array-like): Booleans, True where the predicate holds
+        as_of (date-like): If given, the current run also has to reach this
+            day or the day before; it must always end at the latest entry
+        
+    Returns:
+        dict: 'longest' and 'current' run lengths in days
     """
-    df = get_all_entries()
-    if df.empty:
-        print("No data available for streak analysis.")
-        return
+    days = np.asarray(dates, dtype='datetime64[D]')
+    mask = np.asarray(mask, dtype=bool)
+    if days.size > 1 and (np.diff(days) < np.timedelta64(0, 'D')).any():
+        order = np.argsort(days, kind='stable')
+        days, mask = days[order], mask[order]
+    
+    matching = days[mask]
+    if matching.size == 0:
+        return {'longest': 0, 'current': 0}
+    
+    breaks = np.flatnonzero(np.diff(matching) != np.timedelta64(1, 'D'))
+    starts = np.concatenate(([0], breaks + 1))
+    ends = np.concatenate((breaks, [matching.size - 1]))
+    lengths = ends - starts + 1
+    
+    ongoing = matching[-1] == days[-1]
+    if as_of is not None:
+        ongoing &= matching[-1] >= np.datetime64(pd.Timestamp(as_of).date(), 'D') - np.timedelta64(1, 'D')
+    return {'longest': int(lengths.max()), 'current': int(lengths[-1]) if ongoing else 0}
+
+def mood_in(*moods):
+    """
+    Streak predicate: the entry's mood is one of the given moods.
+    """
+    moods = [mood.title() for mood in moods]
+    return lambda df: df['Mood'].isin(moods)
+
+def sentiment_is(sentiment):
+    """
+    Streak predicate: the entry has the given sentiment.
+    """
+    return lambda df: df['Sentiment'] == sentiment
+
+def activity_present(activity):
+    """
+    Streak predicate: the activity is among the entry's activities.
+    
+    The name is resolved through the activity vocabulary and matched on
+    activity IDs in the index, so entries logged under a merged alias count.
+    """
+    name = normalize_activity(activity)
+    
+    def predicate(df):
+        with _index_connection() as conn:
+            dates = [date for (date,) in conn.execute(
+                "SELECT x.date FROM vocab.activity_aliases s JOIN entry_activities x "
+                "ON x.activity_id = s.activity_id WHERE s.alias = ?", (name,))]
+        return df['Date'].isin(pd.to_datetime(dates, format=DATE_FORMAT))
+    return predicate
+
+def get_streaks(predicate, as_of=None, start_date=None, end_date=None, last_days=None):
+    """
+    Computes streaks for any predicate over all entries or a date window.
+    
+    Args:
+        predicate (callable): Takes the entries DataFrame and returns a boolean
+            Series, e.g. mood_in('happy', 'calm') or activity_present('yoga')
+        as_of (date-like): See compute_streaks
+        start_date, end_date, last_days: Date window, see window_bounds
         
+    Returns:
+        dict: 'longest' and 'current' run lengths in days
+    """
+    df = query_entries(start_date, end_date, last_days)
+    if df.empty:
+        return {'longest': 0, 'current': 0}
+    return compute_streaks(df['Date'].values, predicate(df).fillna(False).values, as_of=as_of)
+
+def get_mood_streaks(start_date=None, end_date=None, last_days=None):
+    """
+    Returns the positive mood streaks, for all entries or a date window.
+    
+    For all entries this reads the incrementally maintained state, and the
+    current streak only counts if it reaches today or yesterday. A window
+    computes the streaks from the index rows in range (found through the
+    index on date); its current streak has to reach the window's last day
+    or the day before.
+    
+    Args:
+        start_date, end_date, last_days: Date window, see window_bounds
+    
+    Returns:
+        dict: 'entries' (int), 'longest' and 'current' positive streaks
+        (in consecutive days) and 'last_negative' (date string or None)
+    """
+    start, end = window_bounds(start_date, end_date, last_days)
+    if start is not None or end is not None:
+        with _index_connection() as conn:
+            rows = conn.execute("SELECT date, sentiment FROM entries_index WHERE date BETWEEN ? AND ? ORDER BY date",
+                                _date_range(start, end)).fetchall()
+        if not rows:
+            return {'entries': 0, 'longest': 0, 'current': 0, 'last_negative': None}
+        streaks = compute_streaks([date for date, _ in rows], [sentiment == 'Positive' for _, sentiment in rows],
+                                  as_of=end or datetime.now())
+        last_negative = max((date for date, sentiment in rows if sentiment == 'Negative'), default=None)
+        return {'entries': len(rows), **streaks, 'last_negative': last_negative}
+    
+    with _index_connection() as conn:
+        entries = conn.execute("SELECT value FROM meta WHERE key = 'entry_count'").fetchone()[0]
+        row = conn.execute(
+            "SELECT current_run, longest_run, last_negative, last_date FROM streak_state WHERE id = 0").fetchone()
+    current, longest, last_negative, last_date = row if row else (0, 0, None, None)
+    yesterday = (datetime.now() - timedelta(days=1)).strftime(DATE_FORMAT)
+    if last_date is None or last_date < yesterday:
+        current = 0
+    return {'entries': entries, 'longest': longest, 'current': current, 'last_negative': last_negative}
+
+def track_mood_streaks(start_date=None, end_date=None, last_days=None):
+    """
+    Tracks and displays positive mood streaks and other streak-based statistics.
+    
+    Args:
+        start_date, end_date, last_days: Date window (see window_bounds),
+            defaults to the session window
+    """
     try:
-        df['Date'] = pd.to_datetime(df['Date'])
-        df = df.sort_values('Date')
-        
-        current_streak = 0
-        max_streak = 0
-        current_positive_streak = 0
-        max_positive_streak = 0
-        
-        print("\n=== Mood Streaks ===")
-        
-        # Calculate streaks
-        for sentiment in df['Sentiment']:
-            if sentiment == 'Positive':
-                current_positive_streak += 1
-                max_positive_streak = max(max_positive_streak, current_positive_streak)
-            else:
-                current_positive_streak = 0
-                
-        # Calculate days since last negative mood
-        last_negative = df[df['Sentiment'] == 'Negative']['Date'].max()
-        if pd.notna(last_negative):
-            days_since_negative = (pd.Timestamp.now() - last_negative).days
-            print(f"Days since last negative mood: {days_since_negative}")
-        
-        print(f"Longest positive mood streak: {max_positive_streak} days")
-        print(f"Current positive mood streak: {current_positive_streak} days")
-        
+        start, end = _resolve_window(start_date, end_date, last_days)
+        streaks = get_mood_streaks(start, end)
     except Exception as e:
         print(f"Error tracking mood streaks: {e}")
+        return
+    if streaks['entries'] == 0:
+        print("No data available for streak analysis.")
+        return
+        
+    print("\n=== Mood Streaks ===")
+    if start or end:
+        print(f"Window: {_window_label(start, end)}")
+    
+    # Calculate days since last negative mood (as of the window end)
+    if streaks['last_negative'] is not None:
+        as_of = datetime.strptime(end, DATE_FORMAT) if end else datetime.now()
+        days_since_negative = (as_of - datetime.strptime(streaks['last_negative'], DATE_FORMAT)).days
+        print(f"Days since last negative mood: {days_since_negative}")
+    
+    print(f"Longest positive mood streak: {streaks['longest']} days")
+    print(f"Current positive mood streak: {streaks['current']} days")
         
 def log_mood():
     """
@@ -391,19 +3160,209 @@ def export_csv():
     """
     export_path = 'data/mood_data_export.csv'
     try:
-        df = pd.read_csv(DATA_FILE)
-        df.to_csv(export_path, index=False)
+        df = get_all_entries()
+        df.to_csv(export_path, index=False, date_format=DATE_FORMAT)
         print(f"Data exported successfully to {export_path}.")
     except Exception as e:
         print(f"Error exporting data: {e}")
 
+def set_analysis_window():
+    """
+    Guides the user through choosing the date window of the analysis views.
+    """
+    print("\n--- Analysis Window ---")
+    print(f"Current window: {_window_label(*window_bounds(**_analysis_window))}")
+    text = input("Last N days (e.g. 30), a date range (YYYY-MM-DD:YYYY-MM-DD, either side may be empty), "
+                 "or empty for all history: ").strip()
+    
+    try:
+        if not text:
+            window = {'start_date': None, 'end_date': None, 'last_days': None}
+        elif ':' in text:
+            start_date, end_date = (part.strip() or None for part in text.split(':', 1))
+            window = {'start_date': start_date, 'end_date': end_date, 'last_days': None}
+        else:
+            window = {'start_date': None, 'end_date': None, 'last_days': int(text)}
+        start, end = window_bounds(**window)
+    except ValueError:
+        print("Invalid window. Please enter a number of days or dates in the format YYYY-MM-DD.")
+        return
+    
+    _analysis_window.update(window)
+    print(f"Analysis window set to {_window_label(start, end)}.")
+
+def generate_past_suggestions():
+    """
+    Guides the user through generating suggestions for past entries.
+    """
+    print("\n--- Generate Suggestions ---")
+    start_date = input("First date (YYYY-MM-DD, empty for the earliest entry): ").strip() or None
+    end_date = input("Last date (YYYY-MM-DD, empty for the latest entry): ").strip() or None
+    
+    try:
+        for date in (start_date, end_date):
+            if date is not None:
+                datetime.strptime(date, DATE_FORMAT)
+    except ValueError:
+        print("Invalid date. Please use the format YYYY-MM-DD.")
+        return
+    
+    try:
+        result = generate_suggestions(start_date, end_date)
+        print(f"Generated {result['generated']} suggestions ({result['skipped']} already stored, "
+              f"{result['failed']} failed). Stored in {SUGGESTIONS_FILE}.")
+    except Exception as e:
+        print(f"Error generating suggestions: {e}")
+
+def analyze_sentiments(notes, batch_size=SENTIMENT_CHUNK_SIZE, workers=None):
+    """
+    Analyzes the sentiment of many notes in parallel batches.
+    
+    Each distinct note is analyzed only once.
+    
+    Args:
+        notes (pandas.Series): Notes to analyze
+        batch_size (int): Distinct notes per batch sent to a worker
+        workers (int): Worker processes, see score_sentiments
+        
+    Returns:
+        pandas.Series: Sentiment categories aligned with notes
+    """
+    unique_notes = pd.unique(notes)
+    polarity, _ = score_sentiments(unique_notes, workers=workers, chunksize=batch_size)
+    return notes.map(dict(zip(unique_notes, sentiment_labels(polarity))))
+
+def _read_import_source(source):
+    """
+    Loads records to import into a DataFrame of strings.
+    
+    Args:
+        source: Path to a .csv or .jsonl file, a DataFrame, or an iterable of dicts
+        
+    Returns:
+        pandas.DataFrame: Records with title-cased column names
+    """
+    if isinstance(source, pd.DataFrame):
+        df = source.copy()
+    elif isinstance(source, (str, os.PathLike)):
+        extension = os.path.splitext(str(source))[1].lower()
+        if extension in ('.jsonl', '.ndjson', '.json'):
+            df = pd.read_json(source, lines=extension != '.json', dtype=False)
+        else:
+            df = pd.read_csv(source, dtype=str, keep_default_na=False)
+    else:
+        df = pd.DataFrame.from_records(list(source))
+    return df.rename(columns=lambda column: str(column).strip().title())
+
+def bulk_import(source, conflict='keep', batch_size=SENTIMENT_CHUNK_SIZE):
+    """
+    Imports many historical entries in a single write.
+    
+    Moods are validated column-wise (validate_mood_input is only called once
+    per distinct invalid mood to build the message), missing sentiments are
+    analyzed in batches, and all accepted rows are appended in one write and
+    one index transaction, so either every row is stored or none is.
+    
+    Args:
+        source: Path to a .csv or .jsonl file, a DataFrame, or an iterable of
+            dicts with Date, Mood, Activities and optionally Notes/Sentiment
+        conflict (str): What to do with dates that already have an entry:
+            'keep' the existing entry, 'overwrite' it, or raise an 'error'.
+            Within the import itself the last row for a date wins.
+        batch_size (int): Notes analyzed per sentiment batch
+        
+    Returns:
+        dict: Counts of 'imported', 'overwritten', 'skipped_existing' and
+        'skipped_invalid' rows
+    """
+    if conflict not in IMPORT_CONFLICT_POLICIES:
+        raise ValueError(f"Unknown conflict policy '{conflict}'. Use one of: {', '.join(IMPORT_CONFLICT_POLICIES)}")
+    
+    df = _read_import_source(source)
+    missing = [column for column in ('Date', 'Mood', 'Activities') if column not in df]
+    if missing:
+        raise ValueError(f"Import is missing required columns: {', '.join(missing)}")
+    for column in ('Notes', 'Sentiment'):
+        if column not in df:
+            df[column] = ''
+    df = df[DATA_COLUMNS].fillna('').astype(str)
+    total = len(df)
+    
+    # Validate dates and moods for the whole column at once
+    dates = pd.to_datetime(df['Date'], errors='coerce', format='mixed')
+    moods = df['Mood'].str.lower().str.strip()
+    valid = dates.notna() & moods.isin(COMMON_MOODS)
+    for mood in moods[dates.notna() & ~valid].unique():
+        print(f"Skipping rows with invalid mood '{mood}': {validate_mood_input(mood)[1]}")
+    df = df[valid].assign(Date=dates[valid].dt.strftime(DATE_FORMAT), Mood=moods[valid].str.title())
+    df = df.drop_duplicates(subset='Date', keep='last')
+    
+    # Resolve conflicts with stored entries
+    with _index_connection() as conn:
+        dates = df['Date'].tolist()
+        existing = set()
+        for start in range(0, len(dates), 500):
+            chunk = dates[start:start + 500]
+            query = f"SELECT date FROM entries_index WHERE date IN ({', '.join('?' * len(chunk))})"
+            existing.update(row[0] for row in conn.execute(query, chunk))
+    if existing and conflict == 'error':
+        raise ValueError(f"{len(existing)} imported dates already have entries, e.g. {min(existing)}")
+    conflicting = df['Date'].isin(existing)
+    if conflict == 'keep':
+        df = df[~conflicting]
+    
+    # Normalize like add_entry and fill in missing sentiments
+    df['Activities'] = df['Activities'].map(lambda activities: ', '.join(parse_activities(activities)))
+    df['Notes'] = df['Notes'].str.replace(r'\s+', ' ', regex=True).str.strip()
+    needs_sentiment = ~df['Sentiment'].isin(SENTIMENT_CATEGORIES)
+    if needs_sentiment.any():
+        df.loc[needs_sentiment, 'Sentiment'] = analyze_sentiments(df.loc[needs_sentiment, 'Notes'], batch_size)
+    
+    if not df.empty:
+        _append_entries(df.sort_values('Date'))
+        _maybe_compact()
+    
+    return {
+        'imported': len(df),
+        'overwritten': int(conflicting.sum()) if conflict == 'overwrite' else 0,
+        'skipped_existing': int(conflicting.sum()) if conflict == 'keep' else 0,
+        'skipped_invalid': int(total - valid.sum()),
+    }
+
+def import_data():
+    """
+    Guides the user through importing mood history from a CSV or JSONL file.
+    """
+    print("\n--- Import Data ---")
+    path = input("Path to a CSV or JSONL file: ").strip()
+    if not os.path.exists(path):
+        print(f"File not found: {path}")
+        return
+    conflict = input("If a date already has an entry: keep, overwrite or error? (keep): ").strip().lower() or 'keep'
+    
+    try:
+        result = bulk_import(path, conflict=conflict)
+        print(f"Imported {result['imported']} entries ({result['overwritten']} overwritten, "
+              f"{result['skipped_existing']} existing kept, {result['skipped_invalid']} invalid skipped).")
+    except Exception as e:
+        print(f"Error importing data: {e}")
+
 def populate_sample_data(num_entries=20):
     """
-    Populates the CSV file with sample data for testing.
+    Populates the data file with sample data for testing.
     
     Args:
         num_entries (int): Number of sample entries to generate
     """
+    try:
+        existed = os.path.exists(get_storage_backend().log_path)
+        if _index_counts()['entries'] > 0:
+            print(f"{DATA_FILE} already contains data. Sample data not added.")
+            return
+    except Exception as e:
+        print(f"Error populating sample data: {e}")
+        return
+    
     moods = list(map(str.title, COMMON_MOODS))  # Use validated moods list
     activities = ['reading', 'jogging', 'coding', 'cooking', 'meditation', 
                  'gaming', 'studying', 'yoga', 'painting', 'cycling']
@@ -415,8 +3374,8 @@ def populate_sample_data(num_entries=20):
         mood = random.choice(moods)
         activity = random.choice(activities)
         note = f"Sample entry for {date} - feeling {mood.lower()}"
-        sentiment = 'Positive' if mood in ['Happy', 'Excited', 'Content'] else \
-                   'Negative' if mood in ['Sad', 'Anxious', 'Frustrated'] else 'Neutral'
+        sentiment = 'Positive' if mood in POSITIVE_MOODS else \
+                   'Negative' if mood in NEGATIVE_MOODS else 'Neutral'
         
         sample_data.append({
             'Date': date,
@@ -429,32 +3388,69 @@ def populate_sample_data(num_entries=20):
     sample_df = pd.DataFrame(sample_data)
     
     try:
-        if os.path.exists(DATA_FILE):
-            df = pd.read_csv(DATA_FILE)
-            if df.empty:
-                sample_df.to_csv(DATA_FILE, index=False)
-                print(f"Added {num_entries} sample entries to {DATA_FILE}.")
-            else:
-                print(f"{DATA_FILE} already contains data. Sample data not added.")
+        if existed:
+            _append_entries(sample_df)
+            print(f"Added {num_entries} sample entries to {DATA_FILE}.")
         else:
-            os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-            sample_df.to_csv(DATA_FILE, index=False)
+            _append_entries(sample_df)
             print(f"Created {DATA_FILE} and added {num_entries} sample entries.")
     except Exception as e:
         print(f"Error populating sample data: {e}")
 
+def check_startup(budget_ms=STARTUP_BUDGET_MS):
+    """
+    Measures, in a fresh interpreter, how long importing the tracker and
+    showing the menu takes, and which heavy libraries get loaded on the way.
+    
+    Both runs use a scratch data file with sample data, so the user's data
+    is never written to.
+    
+    Args:
+        budget_ms (float): Maximum allowed time in milliseconds
+        
+    Returns:
+        bool: True if the menu appeared within budget without heavy imports
+    """
+    with _scratch_data_file() as data_file:
+        with redirect_stdout(io.StringIO()):
+            populate_sample_data()  # measure a normal start, not the first-run setup
+        probe = (
+            "import io, json, sys, time, contextlib\n"
+            "start = time.perf_counter()\n"
+            f"sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})\n"
+            "with contextlib.redirect_stdout(io.StringIO()):\n"
+            "    import Mood_Tracker as tracker\n"
+            f"    tracker.DATA_FILE = {data_file!r}\n"
+            "    tracker.populate_sample_data()\n"
+            "    tracker.display_menu()\n"
+            "elapsed = (time.perf_counter() - start) * 1000\n"
+            f"heavy = [name for name in {STARTUP_HEAVY_MODULES!r} if name in sys.modules]\n"
+            "print(json.dumps({'elapsed_ms': elapsed, 'heavy': heavy}))\n"
+        )
+        result = json.loads(subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True,
+                                           check=True).stdout.strip().splitlines()[-1])
+    
+    print(f"Menu shown after {result['elapsed_ms']:.0f} ms (budget {budget_ms} ms)")
+    if result['heavy']:
+        print(f"Loaded at startup: {', '.join(result['heavy'])}")
+    return result['elapsed_ms'] <= budget_ms and not result['heavy']
+
 def display_menu():
     """
     Displays the main menu options with improved formatting.
     """
-    print("\n=== Personal Mood Tracker ===")
-    print("1. Log Today's Mood")
-    print("2. View Mood Trends")
-    print("3. View Activity Correlations")
-    print("4. View Mood Statistics")
-    print("5. View Mood Streaks")
-    print("6. Export Data")
-    print("7. Exit")
+    with _console_lock:
+        print("\n=== Personal Mood Tracker ===")
+        print("1. Log Today's Mood")
+        print("2. View Mood Trends")
+        print("3. View Activity Correlations")
+        print("4. View Mood Statistics")
+        print("5. View Mood Streaks")
+        print("6. Export Data")
+        print("7. Import Data")
+        print("8. Generate Suggestions for Past Entries")
+        print("9. Set Analysis Window")
+        print("10. Exit")
 
 def main_menu():
     """
@@ -464,7 +3460,7 @@ def main_menu():
     while True:
         try:
             display_menu()
-            choice = input("\nSelect an option (1-7): ").strip()
+            choice = input("\nSelect an option (1-10): ").strip()
             
             if choice == '1':
                 log_mood()
@@ -479,12 +3475,20 @@ def main_menu():
             elif choice == '6':
                 export_csv()
             elif choice == '7':
+                import_data()
+            elif choice == '8':
+                generate_past_suggestions()
+            elif choice == '9':
+                set_analysis_window()
+            elif choice == '10':
+                cancel_pending_suggestions()
                 print("\nThank you for using the Mood Tracker. Goodbye!")
                 break
             else:
-                print("Invalid choice. Please select a number between 1 and 7.")
+                print("Invalid choice. Please select a number between 1 and 10.")
                 
         except KeyboardInterrupt:
+            cancel_pending_suggestions()
             print("\n\nProgram interrupted by user. Exiting...")
             break
         except Exception as e:
@@ -492,6 +3496,14 @@ def main_menu():
             print("Please try again.")
 
 if __name__ == "__main__":
+    if '--benchmark-sentiment' in sys.argv:
+        benchmark_sentiment()
+        sys.exit()
+    if '--benchmark-associations' in sys.argv:
+        benchmark_associations()
+        sys.exit()
+    if '--check-startup' in sys.argv:
+        sys.exit(0 if check_startup() else 1)
     try:
         print("Welcome to the Personal Mood Tracker!")
         print("Initializing...")